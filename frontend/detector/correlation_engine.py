@@ -1,9 +1,202 @@
 # correlation_engine.py - Multi-Engine Correlation Brain
 # Place in: detector/correlation_engine.py
+#
+# Fully annotated so it can be compiled with mypyc for a faster ingest path:
+#     pip install mypy && mypyc correlation_engine.py
+# The built extension is imported in preference to this file; without it the
+# pure-Python module is used unchanged.
 
+import json
+import logging
 import time
-from collections import defaultdict
-from typing import Dict, List, Optional
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import ClassVar, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Base risk points per alert severity (anything unrecognised scores as Low)
+SEVERITY_POINTS = {'Critical': 40, 'High': 20, 'Medium': 10, 'Low': 5}
+
+# CORRELATION MULTIPLIER by number of distinct engines (4+ engines use the max)
+ENGINE_MULTIPLIER = {1: 1.0, 2: 1.5, 3: 2.0}
+MAX_ENGINE_MULTIPLIER = 2.5
+
+# Attack chain templates (engine names as reported in alert['engine'])
+APT_CHAIN_ENGINES = frozenset({'Artifact Engine', 'Traffic Engine', 'Threat Intelligence'})
+INSIDER_EXFIL_ENGINES = frozenset({'Traffic Engine', 'Artifact Engine'})
+NETWORK_ATTACK_ENGINES = frozenset({'IDS', 'Traffic Engine'})
+
+# One bit per known engine, so pattern checks are integer mask tests
+ENGINE_BIT = {
+    'IDS': 1,
+    'Traffic Engine': 2,
+    'UEBA': 4,
+    'Artifact Engine': 8,
+    'Threat Intelligence': 16,
+}
+
+
+def engine_mask(engines: Iterable[str]) -> int:
+    """Fold engine names into an ENGINE_BIT mask (unknown engines add no bits)"""
+    mask = 0
+    for engine in engines:
+        mask |= ENGINE_BIT.get(engine, 0)
+    return mask
+
+
+class AttackPattern(NamedTuple):
+    """
+    Data-driven attack chain template, matched against an entity's engines.
+    
+    A pattern matches when every `required` engine bit is present, at least
+    one `any_of` bit is present (if any are given), no `forbidden` bit is
+    present, and the engine/artifact-alert counts reach their minimums.
+    """
+    required: int
+    any_of: int
+    forbidden: int
+    min_engines: int
+    min_artifacts: int
+    label: str
+
+
+def load_attack_patterns(path: str) -> List[AttackPattern]:
+    """
+    Load extra attack patterns from a JSON file.
+    
+    Expected format (engine names as in ENGINE_BIT, all keys but label optional):
+        [{"label": "...", "required": ["IDS"], "any_of": ["UEBA"],
+          "forbidden": [], "min_engines": 0, "min_artifacts": 0}]
+    """
+    with open(path, 'r') as f:
+        entries = json.load(f)
+    
+    patterns = []
+    for entry in entries:
+        masks = {}
+        for key in ('required', 'any_of', 'forbidden'):
+            engines = entry.get(key, [])
+            unknown = set(engines) - ENGINE_BIT.keys()
+            if unknown:
+                raise ValueError(f"Unknown engine(s) in pattern '{entry['label']}': {sorted(unknown)}")
+            masks[key] = engine_mask(engines)
+        
+        patterns.append(AttackPattern(
+            required=masks['required'],
+            any_of=masks['any_of'],
+            forbidden=masks['forbidden'],
+            min_engines=entry.get('min_engines', 0),
+            min_artifacts=entry.get('min_artifacts', 0),
+            label=entry['label']
+        ))
+    
+    return patterns
+
+# Alert detail fields that identify correlatable entities
+IP_FIELDS = (
+    'ip_address', 'source_ip', 'destination_ip', 'SourceIP',
+    'DestinationIP', 'target_ip', 'attacker_ip'
+)
+USER_FIELDS = ('user_id', 'username', 'email')
+
+# Seconds before the same entity may raise another incident
+INCIDENT_COOLDOWN = 60
+
+# Correlation safety checks
+ENGINE_VOLUME_WINDOW = 3600          # Per-engine alert budget resets hourly
+ARTIFACT_ENTITY_PREFIXES = ('HASH:', 'FILE:')
+
+
+class AlertRecord(NamedTuple):
+    """
+    Compact copy of the alert fields correlation actually reads.
+    
+    Memory holds these instead of the raw alert dicts, so a tracked entity
+    does not pin every alert payload (flow data, user profiles, ...) for the
+    whole time window. One record is shared by all entities of an alert.
+    """
+    timestamp: float
+    engine: str
+    severity: str
+    alert_type: str
+    
+    @classmethod
+    def from_alert(cls, alert: Dict, now: float) -> "AlertRecord":
+        return cls(now, alert.get('engine', 'Unknown'),
+                   alert.get('severity', 'Low'), alert.get('alertType', 'Unknown'))
+
+
+class IncidentTimeline:
+    """
+    Incident timeline, formatted only when it is read or serialized.
+    
+    Holds a snapshot of the entity's AlertRecords; iterating yields the
+    "N. [engine] alertType (severity)" lines the dashboard displays.
+    """
+    __slots__ = ('_records',)
+    
+    def __init__(self, records: Iterable[AlertRecord]) -> None:
+        self._records = tuple(records)
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def __iter__(self) -> Iterator[str]:
+        for idx, r in enumerate(self._records, 1):
+            yield f"{idx}. [{r.engine}] {r.alert_type} ({r.severity})"
+    
+    def to_list(self) -> List[str]:
+        return list(self)
+    
+    def __repr__(self) -> str:
+        return f"IncidentTimeline({self.to_list()!r})"
+
+
+def json_default(obj: object) -> object:
+    """`default=` hook for json.dumps so incidents serialize their timeline"""
+    if isinstance(obj, IncidentTimeline):
+        return obj.to_list()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+@dataclass(slots=True)
+class EntityState:
+    """
+    Running risk aggregates for a single entity.
+    
+    Updated in O(1) as alerts enter and leave the entity's memory, so the
+    risk score never has to be rebuilt from the full alert history.
+    """
+    base_score: int = 0
+    engine_mask: int = 0
+    engine_counts: Counter = field(default_factory=Counter)
+    severity_counts: Counter = field(default_factory=Counter)
+    
+    def add(self, record: AlertRecord) -> None:
+        """Account for an alert entering the entity's memory"""
+        severity = record.severity
+        self.severity_counts[severity] += 1
+        self.base_score += SEVERITY_POINTS.get(severity, SEVERITY_POINTS['Low'])
+        
+        engine = record.engine
+        self.engine_counts[engine] += 1
+        self.engine_mask |= ENGINE_BIT.get(engine, 0)
+    
+    def remove(self, record: AlertRecord) -> None:
+        """Account for an alert expiring from the entity's memory"""
+        severity = record.severity
+        self.base_score -= SEVERITY_POINTS.get(severity, SEVERITY_POINTS['Low'])
+        self.severity_counts[severity] -= 1
+        if not self.severity_counts[severity]:
+            del self.severity_counts[severity]
+        
+        engine = record.engine
+        self.engine_counts[engine] -= 1
+        if not self.engine_counts[engine]:
+            del self.engine_counts[engine]
+            self.engine_mask &= ~ENGINE_BIT.get(engine, 0)
+
 
 class CorrelationBrain:
     """
@@ -16,165 +209,244 @@ class CorrelationBrain:
     4. Generates CRITICAL INCIDENTS when patterns emerge
     """
     
-    def __init__(self, threshold=60, time_window=900):
+    __slots__ = (
+        'time_window', 'threshold', 'patterns',
+        'engine_volume_limit', 'max_alert_entities', 'max_alert_artifacts',
+        'engine_volume', 'engine_window_start',
+        'max_tracked_entities', 'memory', 'entity_state', '_expiry', 'cooldowns',
+        'total_alerts_processed', 'incidents_generated', 'alerts_suppressed',
+        '_active_entities',
+    )
+    
+    # Known attack chains, checked in order
+    PATTERNS: ClassVar[Tuple[AttackPattern, ...]] = (
+        # Pattern 1: APT Chain (Artifact → Traffic → Threat Intel)
+        AttackPattern(required=engine_mask(APT_CHAIN_ENGINES), any_of=0, forbidden=0,
+                      min_engines=0, min_artifacts=0,
+                      label="APT_CHAIN: Malware → C2 Communication → Known Threat"),
+        # Pattern 2: Insider Threat Chain (UEBA → Traffic/Artifact)
+        AttackPattern(required=ENGINE_BIT['UEBA'], any_of=engine_mask(INSIDER_EXFIL_ENGINES),
+                      forbidden=0, min_engines=0, min_artifacts=0,
+                      label="INSIDER_THREAT: Suspicious User + Data Exfiltration"),
+        # Pattern 3: Network Intrusion Chain (IDS → Traffic)
+        AttackPattern(required=engine_mask(NETWORK_ATTACK_ENGINES), any_of=0, forbidden=0,
+                      min_engines=0, min_artifacts=0,
+                      label="NETWORK_ATTACK: Intrusion Attempt + Anomalous Traffic"),
+        # Pattern 4: Malware Outbreak (Artifact → Multiple IPs/Users)
+        AttackPattern(required=0, any_of=0, forbidden=0, min_engines=0, min_artifacts=2,
+                      label="MALWARE_OUTBREAK: Multiple Malicious Files Detected"),
+        # Pattern 5: Multi-Stage Attack (4+ engines)
+        AttackPattern(required=0, any_of=0, forbidden=0, min_engines=4, min_artifacts=0,
+                      label="MULTI_STAGE_ATTACK: Coordinated Attack Across Multiple Vectors"),
+    )
+    
+    def __init__(self, threshold: int = 60, time_window: float = 900,
+                 engine_volume_limit: int = 1000,
+                 max_alert_entities: int = 4, max_alert_artifacts: int = 10,
+                 max_tracked_entities: int = 10_000,
+                 extra_patterns: Iterable[AttackPattern] = ()) -> None:
         """
         Initialize the correlation brain.
         
         Args:
             threshold: Risk score needed to trigger incident (default: 60)
             time_window: How long to remember alerts in seconds (default: 900 = 15 min)
+            engine_volume_limit: Alerts per engine per hour that may enter
+                correlation; a noisier engine is ignored until the hour rolls over
+            max_alert_entities: Max IP/user entities in one alert before it
+                counts as low-evidence and is not correlated
+            max_alert_artifacts: Same limit for HASH:/FILE: entities
+            max_tracked_entities: Cap on entities held in memory and in the
+                cooldown table; the least recently seen entity is evicted first
+            extra_patterns: Additional AttackPatterns (see load_attack_patterns)
+                checked after the built-in ones
         """
         self.time_window = time_window  # 15 minutes memory
         self.threshold = threshold      # Score needed for incident
+        self.patterns: Tuple[AttackPattern, ...] = self.PATTERNS + tuple(extra_patterns)
         
-        # Memory storage: {entity: [alerts]}
+        # Safety checks keeping noisy engines and low-evidence alerts
+        # from flooding memory with "black hole" incidents
+        self.engine_volume_limit = engine_volume_limit
+        self.max_alert_entities = max_alert_entities
+        self.max_alert_artifacts = max_alert_artifacts
+        self.engine_volume: Counter = Counter()
+        self.engine_window_start = time.time()
+        
+        # Memory storage: {entity: deque([AlertRecord])}, least recently seen first
         # Entity can be IP address, user ID, etc.
-        self.memory = defaultdict(list)
+        # No defaultdict on purpose: a stray read must never create an entry.
+        self.max_tracked_entities = max_tracked_entities
+        self.memory: OrderedDict[str, deque] = OrderedDict()
+        
+        # Incremental risk aggregates: {entity: EntityState}
+        self.entity_state: Dict[str, EntityState] = {}
+        
+        # Global expiry queue: (timestamp, entity, record) in arrival order.
+        # Lets cleanup pop only the expired alerts instead of scanning
+        # every entity on each ingest.
+        self._expiry: Deque[Tuple[float, str, AlertRecord]] = deque()
         
-        # Cooldown to prevent spam: {entity: last_incident_time}
-        self.cooldowns = {}
+        # Cooldown to prevent spam: {entity: last_incident_time}, oldest first
+        self.cooldowns: OrderedDict[str, float] = OrderedDict()
         
         # Statistics
         self.total_alerts_processed = 0
         self.incidents_generated = 0
+        self.alerts_suppressed = 0
         
-        print(f"\n🧠 Correlation Brain initialized")
-        print(f"   Threshold: {threshold} points")
-        print(f"   Time Window: {time_window}s ({time_window/60:.0f} minutes)")
+        # Cached per-entity summary for get_statistics (None = stale)
+        self._active_entities: Optional[List[Dict]] = None
+        
+        print("\n🧠 Correlation Brain initialized")
+        print("  ", repr(self))
+    
+    def __repr__(self) -> str:
+        return (f"CorrelationBrain(threshold={self.threshold} points, "
+                f"time_window={self.time_window}s ({self.time_window/60:.0f} minutes))")
     
-    def _clean_old_memory(self):
+    def _clean_old_memory(self, now: float) -> None:
         """Remove alerts older than the time window"""
-        current_time = time.time()
-        
-        for entity in list(self.memory.keys()):
-            # Keep only recent alerts
-            self.memory[entity] = [
-                alert for alert in self.memory[entity]
-                if (current_time - alert['timestamp']) < self.time_window
-            ]
+        cutoff = now - self.time_window
+        expiry = self._expiry
+        
+        # Alerts are timestamped on ingest, so the queue is time-ordered
+        # and the oldest alert of each entity is always at its left end
+        while expiry and expiry[0][0] <= cutoff:
+            _, entity, record = expiry.popleft()
+            alerts = self.memory.get(entity)
+            if alerts is None or alerts[0] is not record:
+                # Entity was evicted (and possibly re-tracked) since then
+                continue
+            alerts.popleft()
+            self._active_entities = None
+            self.entity_state[entity].remove(record)
             
             # Remove empty entries
-            if not self.memory[entity]:
+            if not alerts:
                 del self.memory[entity]
+                del self.entity_state[entity]
+        
+        # Cooldowns are refreshed in time order, so expired ones sit at the front
+        cooldowns = self.cooldowns
+        cooldown_cutoff = now - INCIDENT_COOLDOWN
+        while cooldowns:
+            entity, last_incident = next(iter(cooldowns.items()))
+            if last_incident > cooldown_cutoff:
+                break
+            del cooldowns[entity]
+    
+    def _is_low_evidence(self, entities: Set[str]) -> bool:
+        """
+        An alert naming many distinct entities says little about any one of
+        them, and correlating it would link unrelated targets together.
+        """
+        artifacts = sum(1 for e in entities if e.startswith(ARTIFACT_ENTITY_PREFIXES))
+        return (artifacts > self.max_alert_artifacts or
+                len(entities) - artifacts > self.max_alert_entities)
+    
+    def _engine_over_volume(self, engine: str, now: float) -> bool:
+        """Count an alert against its engine's hourly budget"""
+        if now - self.engine_window_start >= ENGINE_VOLUME_WINDOW:
+            self.engine_volume.clear()
+            self.engine_window_start = now
+        
+        self.engine_volume[engine] += 1
+        return self.engine_volume[engine] > self.engine_volume_limit
     
-    def _extract_entities(self, alert) -> List[str]:
+    def _extract_entities(self, alert: Dict) -> Set[str]:
         """
         Extract entities (IPs, users) from an alert.
         
         Entities are the "targets" or "actors" we're tracking.
+        Returned as a set, so duplicates are already removed.
         """
-        entities = []
+        entities: Set[str] = set()
+        add = entities.add
         details = alert.get('details', {})
+        get = details.get
         
         # Extract IP Addresses
-        ip_fields = [
-            'ip_address', 'source_ip', 'destination_ip', 'SourceIP',
-            'DestinationIP', 'target_ip', 'attacker_ip'
-        ]
-        for field in ip_fields:
-            if field in details and details[field]:
-                entities.append(str(details[field]))
+        for field in IP_FIELDS:
+            value = get(field)
+            if value:
+                add(str(value))
         
         # Extract from flow_data if present
-        if 'flow_data' in details:
-            flow = details['flow_data']
-            for field in ip_fields:
-                if field in flow and flow[field]:
-                    entities.append(str(flow[field]))
+        flow = get('flow_data')
+        if flow:
+            flow_get = flow.get
+            for field in IP_FIELDS:
+                value = flow_get(field)
+                if value:
+                    add(str(value))
         
         # Extract Users
-        user_fields = ['user_id', 'username', 'email']
-        for field in user_fields:
-            if field in details and details[field]:
-                entities.append(f"USER:{details[field]}")
+        for field in USER_FIELDS:
+            value = get(field)
+            if value:
+                add('USER:' + str(value))
         
         # Extract from user_profile if present
-        if 'user_profile' in details:
-            profile = details['user_profile']
-            for field in user_fields:
-                if field in profile and profile[field]:
-                    entities.append(f"USER:{profile[field]}")
+        profile = get('user_profile')
+        if profile:
+            profile_get = profile.get
+            for field in USER_FIELDS:
+                value = profile_get(field)
+                if value:
+                    add('USER:' + str(value))
         
         # Extract file hashes (for artifact correlation)
-        if 'file_hash' in details and details['file_hash']:
-            entities.append(f"HASH:{details['file_hash']}")
+        value = get('file_hash')
+        if value:
+            add('HASH:' + str(value))
         
-        if 'filename' in details and details['filename']:
-            entities.append(f"FILE:{details['filename']}")
+        value = get('filename')
+        if value:
+            add('FILE:' + str(value))
         
-        # Remove duplicates
-        return list(set(entities))
+        return entities
     
-    def _calculate_risk_score(self, alerts: List[Dict]) -> tuple:
+    def _calculate_risk_score(self, state: EntityState) -> Tuple[int, List[str], Dict[str, int]]:
         """
-        Calculate total risk score based on multiple factors.
+        Calculate total risk score from an entity's running aggregates.
         
         Returns:
             (risk_score, engines_involved, severity_breakdown)
         """
-        score = 0
-        engines_involved = set()
-        severity_counts = {'Critical': 0, 'High': 0, 'Medium': 0, 'Low': 0}
-        
-        for alert in alerts:
-            engine = alert.get('engine', 'Unknown')
-            severity = alert.get('severity', 'Low')
-            
-            engines_involved.add(engine)
-            severity_counts[severity] += 1
-            
-            # Base scores by severity
-            if severity == 'Critical':
-                score += 40
-            elif severity == 'High':
-                score += 20
-            elif severity == 'Medium':
-                score += 10
-            else:
-                score += 5
-        
         # CORRELATION MULTIPLIER - The key insight!
         # Multiple engines seeing the same target = Much more serious
-        num_engines = len(engines_involved)
+        num_engines = len(state.engine_counts)
+        multiplier = ENGINE_MULTIPLIER.get(num_engines, MAX_ENGINE_MULTIPLIER)
+        score = int(state.base_score * multiplier)
         
-        if num_engines == 2:
-            score = int(score * 1.5)  # 50% bonus
-        elif num_engines == 3:
-            score = int(score * 2.0)  # 100% bonus
-        elif num_engines >= 4:
-            score = int(score * 2.5)  # 150% bonus - VERY SERIOUS!
+        # The four known levels are always present (zero if unseen), so the
+        # breakdown keeps the shape the backend stores; other levels are added
+        severity_breakdown = {**dict.fromkeys(SEVERITY_POINTS, 0), **state.severity_counts}
         
-        return score, list(engines_involved), severity_counts
+        return score, list(state.engine_counts), severity_breakdown
     
-    def _detect_attack_patterns(self, alerts: List[Dict]) -> List[str]:
+    def _detect_attack_patterns(self, mask: int, artifact_count: int,
+                                total_engines: int) -> List[str]:
         """
         Detect known attack chain patterns.
         
+        Args:
+            mask: ENGINE_BIT mask of the engines that reported on the entity
+            artifact_count: Number of Artifact Engine alerts for the entity
+            total_engines: Number of distinct engines involved
+        
         Returns list of detected patterns.
         """
-        patterns = []
-        engines = {alert.get('engine') for alert in alerts}
-        
-        # Pattern 1: APT Chain (Artifact → Traffic → Threat Intel)
-        if {'Artifact Engine', 'Traffic Engine', 'Threat Intelligence'}.issubset(engines):
-            patterns.append("APT_CHAIN: Malware → C2 Communication → Known Threat")
-        
-        # Pattern 2: Insider Threat Chain (UEBA → Traffic/Artifact)
-        if 'UEBA' in engines and ('Traffic Engine' in engines or 'Artifact Engine' in engines):
-            patterns.append("INSIDER_THREAT: Suspicious User + Data Exfiltration")
-        
-        # Pattern 3: Network Intrusion Chain (IDS → Traffic)
-        if {'IDS', 'Traffic Engine'}.issubset(engines):
-            patterns.append("NETWORK_ATTACK: Intrusion Attempt + Anomalous Traffic")
-        
-        # Pattern 4: Malware Outbreak (Artifact → Multiple IPs/Users)
-        artifact_alerts = [a for a in alerts if a.get('engine') == 'Artifact Engine']
-        if len(artifact_alerts) >= 2:
-            patterns.append("MALWARE_OUTBREAK: Multiple Malicious Files Detected")
+        patterns: List[str] = []
         
-        # Pattern 5: Multi-Stage Attack (4+ engines)
-        if len(engines) >= 4:
-            patterns.append("MULTI_STAGE_ATTACK: Coordinated Attack Across Multiple Vectors")
+        for required, any_of, forbidden, min_engines, min_artifacts, label in self.patterns:
+            if ((mask & required) == required
+                    and (not any_of or mask & any_of)
+                    and not mask & forbidden
+                    and total_engines >= min_engines
+                    and artifact_count >= min_artifacts):
+                patterns.append(label)
         
         return patterns
     
@@ -188,11 +460,36 @@ class CorrelationBrain:
         Returns:
             Incident dict if correlation detected, None otherwise
         """
-        self._clean_old_memory()
+        incidents = self.ingest_batch([alert])
+        return incidents[0] if incidents else None
+    
+    def ingest_batch(self, alerts: Iterable[Dict]) -> List[Dict]:
+        """
+        Ingest a burst of alerts with a single clock read and memory cleanup.
+        
+        Alerts are correlated in order and all share the batch timestamp, so
+        the result is the same as ingesting them one by one within the same
+        instant.
+        
+        Returns:
+            Incident dicts generated by the batch (empty list if none)
+        """
+        now = time.time()
+        self._clean_old_memory(now)
+        
+        incidents: List[Dict] = []
+        for alert in alerts:
+            incident = self._ingest(alert, now)
+            if incident is not None:
+                incidents.append(incident)
+        return incidents
+    
+    def _ingest(self, alert: Dict, now: float) -> Optional[Dict]:
+        """Correlate one alert at time `now` (memory already cleaned)"""
         self.total_alerts_processed += 1
         
         # Add timestamp for tracking
-        alert['timestamp'] = time.time()
+        alert['timestamp'] = now
         
         # Extract entities (IPs, users, etc.) from this alert
         entities = self._extract_entities(alert)
@@ -201,40 +498,71 @@ class CorrelationBrain:
             # No entities to correlate - just a standalone alert
             return None
         
-        incident_generated = None
+        # Only the fields correlation needs are kept in memory
+        record = AlertRecord.from_alert(alert, now)
+        
+        # Safety checks: keep low-evidence alerts and noisy engines out of
+        # memory. Evidence is checked first so only alerts that would be
+        # correlated count against the engine's hourly budget.
+        if (self._is_low_evidence(entities) or
+                self._engine_over_volume(record.engine, now)):
+            self.alerts_suppressed += 1
+            return None
         
         for entity in entities:
             # Add alert to this entity's history
-            self.memory[entity].append(alert)
+            entity_alerts = self.memory.get(entity)
+            if entity_alerts is None:
+                entity_alerts = self.memory[entity] = deque()
+                state = self.entity_state[entity] = EntityState()
+                if len(self.memory) > self.max_tracked_entities:
+                    evicted, _ = self.memory.popitem(last=False)
+                    del self.entity_state[evicted]
+            else:
+                self.memory.move_to_end(entity)
+                state = self.entity_state[entity]
+            entity_alerts.append(record)
+            self._expiry.append((now, entity, record))
+            state.add(record)
+            self._active_entities = None
             
             # Analyze all alerts for this entity
-            entity_alerts = self.memory[entity]
-            risk_score, engines, severity_counts = self._calculate_risk_score(entity_alerts)
+            risk_score, engines, severity_counts = self._calculate_risk_score(state)
             
             # Check if threshold exceeded
             if risk_score >= self.threshold:
                 # Check cooldown (don't spam same incident)
                 if entity in self.cooldowns:
-                    time_since_last = time.time() - self.cooldowns[entity]
-                    if time_since_last < 60:  # 1 minute cooldown
+                    time_since_last = now - self.cooldowns[entity]
+                    if time_since_last < INCIDENT_COOLDOWN:  # 1 minute cooldown
                         continue
                 
                 # INCIDENT DETECTED! 🚨
-                self.cooldowns[entity] = time.time()
+                self.cooldowns[entity] = now
+                self.cooldowns.move_to_end(entity)
+                if len(self.cooldowns) > self.max_tracked_entities:
+                    self.cooldowns.popitem(last=False)
                 self.incidents_generated += 1
                 
                 # Detect attack patterns
-                patterns = self._detect_attack_patterns(entity_alerts)
+                engine_counts = state.engine_counts
+                patterns = self._detect_attack_patterns(
+                    state.engine_mask,
+                    engine_counts['Artifact Engine'],
+                    len(engine_counts)
+                )
+                
+                # Incident timeline, formatted lazily on serialization
+                # (use json_default when encoding the incident)
+                timeline = IncidentTimeline(entity_alerts)
                 
-                # Build incident timeline
-                timeline = []
-                for idx, a in enumerate(entity_alerts, 1):
-                    engine = a.get('engine', 'Unknown')
-                    alert_type = a.get('alertType', 'Unknown')
-                    severity = a.get('severity', 'Low')
-                    timeline.append(f"{idx}. [{engine}] {alert_type} ({severity})")
+                # Alerts are appended in ingest order, so the window
+                # bounds are simply the first and last entries
+                window_start = entity_alerts[0].timestamp
+                window_end = entity_alerts[-1].timestamp
+                assert window_start <= window_end, "entity alerts out of order"
                 
-                incident_generated = {
+                incident_generated: Dict = {
                     "engine": "CORRELATION BRAIN",
                     "severity": "Critical",
                     "alertType": "Multi-Vector Attack Incident",
@@ -247,22 +575,27 @@ class CorrelationBrain:
                         "severity_breakdown": severity_counts,
                         "attack_patterns": patterns,
                         "timeline": timeline,
-                        "window_start": min(a['timestamp'] for a in entity_alerts),
-                        "window_end": max(a['timestamp'] for a in entity_alerts),
-                        "attack_duration": max(a['timestamp'] for a in entity_alerts) - min(a['timestamp'] for a in entity_alerts)
+                        "window_start": window_start,
+                        "window_end": window_end,
+                        "attack_duration": window_end - window_start
                     }
                 }
                 
-                print(f"\n{'='*70}")
-                print(f"🧠 CORRELATION BRAIN - INCIDENT DETECTED!")
-                print(f"{'='*70}")
-                print(f"Target: {entity}")
-                print(f"Risk Score: {risk_score} (threshold: {self.threshold})")
-                print(f"Engines Involved: {', '.join(engines)}")
-                print(f"Alert Count: {len(entity_alerts)}")
-                if patterns:
-                    print(f"Attack Patterns: {', '.join(patterns)}")
-                print(f"{'='*70}\n")
+                if logger.isEnabledFor(logging.INFO):
+                    lines = [
+                        "",
+                        "=" * 70,
+                        "🧠 CORRELATION BRAIN - INCIDENT DETECTED!",
+                        "=" * 70,
+                        f"Target: {entity}",
+                        f"Risk Score: {risk_score} (threshold: {self.threshold})",
+                        f"Engines Involved: {', '.join(engines)}",
+                        f"Alert Count: {len(entity_alerts)}",
+                    ]
+                    if patterns:
+                        lines.append(f"Attack Patterns: {', '.join(patterns)}")
+                    lines.append("=" * 70)
+                    logger.info("%s", "\n".join(lines))
                 
                 # Optional: Clear memory to prevent re-triggering
                 # Uncomment if you want one-shot incidents
@@ -273,27 +606,44 @@ class CorrelationBrain:
         return None
     
     def get_statistics(self) -> Dict:
-        """Get correlation engine statistics"""
-        return {
-            "total_alerts_processed": self.total_alerts_processed,
-            "incidents_generated": self.incidents_generated,
-            "entities_tracked": len(self.memory),
-            "active_entities": [
+        """
+        Get correlation engine statistics.
+        
+        The per-entity summary comes from the running EntityState aggregates
+        and is reused until memory changes, so polling is cheap even while
+        an attack keeps entities busy.
+        """
+        if self._active_entities is None:
+            memory = self.memory
+            self._active_entities = [
                 {
                     "entity": entity,
-                    "alert_count": len(alerts),
-                    "engines": list({a.get('engine') for a in alerts})
+                    "alert_count": len(memory[entity]),
+                    "engines": list(state.engine_counts)
                 }
-                for entity, alerts in self.memory.items()
+                for entity, state in self.entity_state.items()
             ]
+        
+        return {
+            "total_alerts_processed": self.total_alerts_processed,
+            "incidents_generated": self.incidents_generated,
+            "alerts_suppressed": self.alerts_suppressed,
+            "entities_tracked": len(self.memory),
+            "active_entities": self._active_entities
         }
     
-    def reset(self):
+    def reset(self) -> None:
         """Reset the correlation brain (useful for testing)"""
         self.memory.clear()
+        self.entity_state.clear()
+        self._expiry.clear()
         self.cooldowns.clear()
+        self.engine_volume.clear()
+        self.engine_window_start = time.time()
         self.total_alerts_processed = 0
         self.incidents_generated = 0
+        self.alerts_suppressed = 0
+        self._active_entities = None
         print("\n🧠 Correlation Brain reset")
 
 
@@ -312,8 +662,7 @@ class AttackChainDetector:
         Artifact (malware) → Traffic (C2 beacon) → Threat Intel (known bad IP)
         """
         engines = {a.get('engine') for a in alerts}
-        required = {'Artifact Engine', 'Traffic Engine', 'Threat Intelligence'}
-        return required.issubset(engines)
+        return APT_CHAIN_ENGINES.issubset(engines)
     
     @staticmethod
     def detect_insider_threat(alerts: List[Dict]) -> bool:
@@ -322,8 +671,7 @@ class AttackChainDetector:
         UEBA (suspicious behavior) + (Traffic or Artifact)
         """
         engines = {a.get('engine') for a in alerts}
-        return ('UEBA' in engines and 
-                ('Traffic Engine' in engines or 'Artifact Engine' in engines))
+        return 'UEBA' in engines and not INSIDER_EXFIL_ENGINES.isdisjoint(engines)
     
     @staticmethod
     def detect_network_attack(alerts: List[Dict]) -> bool:
@@ -332,7 +680,7 @@ class AttackChainDetector:
         IDS (intrusion) + Traffic (anomaly)
         """
         engines = {a.get('engine') for a in alerts}
-        return {'IDS', 'Traffic Engine'}.issubset(engines)
+        return NETWORK_ATTACK_ENGINES.issubset(engines)
     
     @staticmethod
     def detect_lateral_movement(alerts: List[Dict]) -> bool:
@@ -354,63 +702,77 @@ class AttackChainDetector:
 
 # === Helper Functions ===
 
-def create_correlation_brain(threshold=60, time_window=900):
+def create_correlation_brain(threshold: int = 60, time_window: float = 900) -> CorrelationBrain:
     """Factory function to create a CorrelationBrain instance"""
     return CorrelationBrain(threshold=threshold, time_window=time_window)
 
 
 if __name__ == "__main__":
+    import sys
+    
+    # Under `python -O`, __debug__ is False and all harness output below is
+    # compiled out; only the correlation logic itself runs.
+    logging.basicConfig(level=logging.INFO if __debug__ else logging.WARNING,
+                        format='%(message)s')
+    
     # Test the correlation brain
-    print("\n" + "="*70)
-    print("  🧪 TESTING CORRELATION BRAIN")
-    print("="*70)
+    if __debug__:
+        sys.stdout.write("\n" + "="*70 + "\n  🧪 TESTING CORRELATION BRAIN\n" + "="*70 + "\n")
     
     brain = CorrelationBrain(threshold=50, time_window=900)
     
     # Simulate attack chain
     test_ip = "192.168.1.100"
     
-    print("\n1️⃣ Simulating malware detection...")
-    alert1 = {
-        "engine": "Artifact Engine",
-        "severity": "Critical",
-        "alertType": "Malware Detected",
-        "details": {"source_ip": test_ip, "filename": "malware.exe"}
-    }
-    incident = brain.ingest_alert(alert1)
-    print(f"   Incident generated: {incident is not None}")
-    
-    print("\n2️⃣ Simulating C2 traffic...")
-    alert2 = {
-        "engine": "Traffic Engine",
-        "severity": "Medium",
-        "alertType": "Anomalous Traffic",
-        "details": {"source_ip": test_ip, "error": 0.05}
-    }
-    incident = brain.ingest_alert(alert2)
-    print(f"   Incident generated: {incident is not None}")
-    
-    print("\n3️⃣ Simulating threat intelligence hit...")
-    alert3 = {
-        "engine": "Threat Intelligence",
-        "severity": "High",
-        "alertType": "Malicious IP",
-        "details": {"source_ip": test_ip, "threat_score": 95}
-    }
-    incident = brain.ingest_alert(alert3)
-    print(f"   Incident generated: {incident is not None}")
-    
-    if incident:
-        print(f"\n🎯 INCIDENT DETAILS:")
-        print(f"   Risk Score: {incident['details']['risk_score']}")
-        print(f"   Engines: {incident['details']['engines_involved']}")
-        print(f"   Patterns: {incident['details']['attack_patterns']}")
-    
-    # Print statistics
-    stats = brain.get_statistics()
-    print(f"\n📊 STATISTICS:")
-    print(f"   Alerts Processed: {stats['total_alerts_processed']}")
-    print(f"   Incidents Generated: {stats['incidents_generated']}")
-    print(f"   Entities Tracked: {stats['entities_tracked']}")
-    
-    print("\n" + "="*70 + "\n")
+    steps = [
+        ("1️⃣ Simulating malware detection...", {
+            "engine": "Artifact Engine",
+            "severity": "Critical",
+            "alertType": "Malware Detected",
+            "details": {"source_ip": test_ip, "filename": "malware.exe"}
+        }),
+        ("2️⃣ Simulating C2 traffic...", {
+            "engine": "Traffic Engine",
+            "severity": "Medium",
+            "alertType": "Anomalous Traffic",
+            "details": {"source_ip": test_ip, "error": 0.05}
+        }),
+        ("3️⃣ Simulating threat intelligence hit...", {
+            "engine": "Threat Intelligence",
+            "severity": "High",
+            "alertType": "Malicious IP",
+            "details": {"source_ip": test_ip, "threat_score": 95}
+        }),
+    ]
+    
+    last_incident = None
+    for description, alert in steps:
+        if __debug__:
+            sys.stdout.write(f"\n{description}\n")
+        incident = brain.ingest_alert(alert)
+        if incident:
+            last_incident = incident
+        if __debug__:
+            sys.stdout.write(f"   Incident generated: {incident is not None}\n")
+    
+    if __debug__:
+        stats = brain.get_statistics()
+        out = []
+        if last_incident:
+            details = last_incident['details']
+            out += [
+                "\n🎯 INCIDENT DETAILS:\n",
+                f"   Risk Score: {details['risk_score']}\n",
+                f"   Engines: {details['engines_involved']}\n",
+                f"   Patterns: {details['attack_patterns']}\n",
+            ]
+        
+        # Print statistics
+        out += [
+            "\n📊 STATISTICS:\n",
+            f"   Alerts Processed: {stats['total_alerts_processed']}\n",
+            f"   Incidents Generated: {stats['incidents_generated']}\n",
+            f"   Entities Tracked: {stats['entities_tracked']}\n",
+            "\n" + "="*70 + "\n\n",
+        ]
+        sys.stdout.write("".join(out))
@@ -2,71 +2,148 @@
 # Place in: detector/detector.py
 
 import requests
-import json
+import orjson
 import sys
-import os
 import logging
+import atexit
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Optional, Dict
+from typing import TYPE_CHECKING, Optional, Dict
+from urllib.parse import urlsplit
 
-# Import ModelManager and CorrelationBrain
-from model_manager import ModelManager, load_all_engines, run_system_health_check
-from correlation_engine import CorrelationBrain
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# CorrelationBrain is cheap to import; model_manager pulls in TensorFlow and
+# is only imported by initialize(), so the CLI answers usage errors instantly
+from correlation_engine import CorrelationBrain, json_default, load_attack_patterns
+from env import get_env
+
+if TYPE_CHECKING:
+    from model_manager import ModelManager
 
 # Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("detector.log"),
-        logging.StreamHandler()
-    ]
-)
+# Callers only enqueue records; a listener thread does the file and console
+# writes, so a slow disk never stalls an analyzer.
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_handlers = [logging.FileHandler("detector.log"), logging.StreamHandler()]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+# QueueHandler.prepare() formats each record before enqueueing it; a bare
+# message formatter keeps the listener's handlers the only ones adding the
+# timestamp and level (basicConfig would install BASIC_FORMAT here).
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+_root_logger = logging.getLogger()
+_root_logger.addHandler(_queue_handler)
+_root_logger.setLevel(get_env("LOG_LEVEL", "INFO").upper())
+_log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
+# Banner rule used by all console output
+_BAR = "=" * 70
+
+def _banner(title: str, *args):
+    """Log a section banner as one record; skipped entirely below INFO"""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"{_BAR}\n  {title}\n{_BAR}", *args)
+
 # === CONFIGURATION ===
+@dataclass(frozen=True, slots=True)
 class Config:
-    BACKEND_API_URL = os.getenv("BACKEND_API_URL", "http://localhost:5000/api/alerts")
-    IPQS_API_KEY = os.getenv("IPQS_API_KEY")
-    VIRUSTOTAL_API_KEY = os.getenv("VIRUSTOTAL_API_KEY")
+    """Detector settings, read from the environment once at import"""
+    BACKEND_API_URL: str = get_env("BACKEND_API_URL", "http://localhost:5000/api/alerts")
+    BACKEND_BATCH_URL: str = get_env("BACKEND_BATCH_URL", BACKEND_API_URL.rstrip("/") + "/batch")
+    IPQS_API_KEY: Optional[str] = get_env("IPQS_API_KEY")
+    VIRUSTOTAL_API_KEY: Optional[str] = get_env("VIRUSTOTAL_API_KEY")
     
     # Correlation settings
-    CORRELATION_THRESHOLD = int(os.getenv("CORRELATION_THRESHOLD", "60"))
-    CORRELATION_TIME_WINDOW = int(os.getenv("CORRELATION_TIME_WINDOW", "900"))  # 15 min
+    CORRELATION_THRESHOLD: int = int(get_env("CORRELATION_THRESHOLD", "60"))
+    CORRELATION_TIME_WINDOW: int = int(get_env("CORRELATION_TIME_WINDOW", "900"))  # 15 min
+    CORRELATION_PATTERN_FILE: Optional[str] = get_env("CORRELATION_PATTERN_FILE")  # Extra attack patterns (JSON)
     
     # API Settings
-    IPQS_FRAUD_THRESHOLD = 75
-    VT_MALICIOUS_THRESHOLD = 1
-    API_TIMEOUT = 5
-    MAX_RETRIES = 3
+    IPQS_FRAUD_THRESHOLD: int = 75
+    IPQS_CRITICAL_SCORE: int = 90  # Critical on IPQS alone, VirusTotal not awaited
+    VT_MALICIOUS_THRESHOLD: int = 1
+    INTEL_CACHE_SIZE: int = 10_000
+    INTEL_CACHE_TTL: float = 3600  # seconds
+    INTEL_NEGATIVE_TTL: float = 300  # seconds before a failed lookup is retried
+    API_TIMEOUT: float = 5
+    INTEL_DEADLINE: float = 5  # seconds the caller waits for the whole enrichment
+    # Intel lookups are budgeted so a worker is freed within the deadline:
+    # one read, plus INTEL_RETRIES extra connect attempts, fits INTEL_DEADLINE
+    # ((INTEL_RETRIES + 1) x connect + read <= INTEL_DEADLINE)
+    INTEL_TIMEOUT: tuple = (1, 3)  # (connect, read) seconds
+    INTEL_RETRIES: int = 1  # connect failures only; a sent request is never resent
+    MAX_RETRIES: int = 3
+    
+    # Micro-batch concurrent autoencoder inference (off by default)
+    INFERENCE_BATCHING: bool = get_env("INFERENCE_BATCHING", "0") == "1"
+    
+    # Dashboard batching: payloads queued within the window go out together
+    BATCH_MAX: int = 32
+    BATCH_WINDOW: float = 0.05  # seconds
 
-# === INITIALIZATION ===
-print("\n" + "="*70)
-print("  🚀 INITIALIZING AEGIS SECURITY PLATFORM")
-print("="*70)
-
-# Load all engines using ModelManager
-print("\n[1/3] Loading ML Engines...")
-ENGINES = load_all_engines()
-
-# Run health checks
-print("\n[2/3] Running Health Checks...")
-if ENGINES:
-    system_healthy = run_system_health_check(ENGINES)
-else:
-    print("\n❌ NO ENGINES LOADED")
-    sys.exit(1)
-
-# Initialize Correlation Brain
-print("\n[3/3] Initializing Correlation Brain...")
-BRAIN = CorrelationBrain(
-    threshold=Config.CORRELATION_THRESHOLD,
-    time_window=Config.CORRELATION_TIME_WINDOW
+CFG = Config()
+
+# === HTTP SESSION ===
+# One keep-alive session for every outbound call (threat intel + dashboard),
+# so repeated requests to the same host skip TCP/TLS setup. Threat-intel
+# lookups only retry failed connects: the deadline is spent on one read, and
+# error or rate-limit (429) responses are not retried, since every retry
+# spends quota. read=False lets a read timeout surface as requests.ReadTimeout.
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=CFG.INTEL_RETRIES,
+        connect=CFG.INTEL_RETRIES,
+        read=False,
+        backoff_factor=0.2
+    )
 )
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+# Dashboard POSTs get their own policy: POST is not retried by default, but
+# 502/503 mean the proxy could not hand the request to the backend, so
+# resending is safe. A 504 or a read timeout is not retried (read=0): the
+# backend may already have stored the alert. raise_on_status=False hands the
+# final response back so callers still see an HTTPError once retries are
+# exhausted.
+_backend = urlsplit(CFG.BACKEND_API_URL)
+SESSION.mount(f"{_backend.scheme}://{_backend.netloc}/", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    max_retries=Retry(
+        total=CFG.MAX_RETRIES,
+        read=0,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503),
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False
+    )
+))
 
-print("\n" + "="*70)
-print("  ✅ AEGIS PLATFORM READY")
-print("="*70 + "\n")
+# === ENGINE STATE ===
+# Populated by initialize(); until then every analyzer is a no-op stub
+ENGINES: Dict[str, "ModelManager"] = {}
+BRAIN: Optional[CorrelationBrain] = None
+ARTIFACT_INPUTS: Dict[str, Dict] = {}
 
 # === TEST DATA ===
 NORMAL_FLOW = {'Protocol': 6.0, 'FlowDuration': 11.0, 'TotalFwdPackets': 1.0}
@@ -82,96 +159,196 @@ OBVIOUS_ATTACKER = {'user_id': 'USR666', 'avg_session_hours': 2.1, 'after_hours_
                     'total_http_volume': 5e8, 'total_files_accessed': 13000}
 
 # === THREAT INTELLIGENCE ===
+# IPQS and VirusTotal lookups are independent I/O, so they run side by side
+INTEL_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="intel")
+
+def _intel_cache(func):
+    """
+    Memoize a lookup per IP for INTEL_CACHE_TTL seconds (LRU-bounded).
+    
+    Failed or rate-limited lookups (None) are cached too, but only for
+    INTEL_NEGATIVE_TTL, so an IP the API keeps rejecting doesn't cost a full
+    round-trip on every sighting. A timeout is not cached at all: the query
+    functions let requests.Timeout through, and a transient slowdown must
+    not hide the IP from enrichment for the negative TTL. The API key is
+    constant for the process and is not part of the key.
+    """
+    cache: "OrderedDict[str, tuple]" = OrderedDict()
+    lock = threading.Lock()
+    
+    @wraps(func)
+    def wrapper(ip: str, api_key: Optional[str]) -> Optional[Dict]:
+        now = time.monotonic()
+        with lock:
+            entry = cache.get(ip)
+            if entry is not None:
+                expires, data = entry
+                if expires > now:
+                    cache.move_to_end(ip)
+                    return data
+                del cache[ip]
+        
+        try:
+            data = func(ip, api_key)
+        except requests.Timeout as e:
+            logger.warning("%s timed out for %s: %s", func.__name__, ip, e)
+            return None
+        ttl = CFG.INTEL_CACHE_TTL if data is not None else CFG.INTEL_NEGATIVE_TTL
+        with lock:
+            cache[ip] = (now + ttl, data)
+            cache.move_to_end(ip)
+            if len(cache) > CFG.INTEL_CACHE_SIZE:
+                cache.popitem(last=False)
+        return data
+    
+    wrapper.cache_clear = cache.clear
+    return wrapper
+
+# The query functions return only the fields the scoring uses, so the cache
+# holds a few numbers per IP rather than whole API responses.
+@_intel_cache
 def query_ipqs(ip: str, api_key: Optional[str]) -> Optional[Dict]:
     if not api_key:
         return None
     url = f"https://www.ipqualityscore.com/api/json/ip/{api_key}/{ip}"
     try:
-        response = requests.get(url, timeout=Config.API_TIMEOUT)
+        response = SESSION.get(url, timeout=CFG.INTEL_TIMEOUT)
         response.raise_for_status()
-        data = response.json()
-        return data if data.get('success') else None
+        data = orjson.loads(response.content)
+        if not data.get('success'):
+            return None
+        return {
+            "fraud_score": data.get('fraud_score', 0),
+            "proxy": data.get('proxy', False),
+            "vpn": data.get('vpn', False),
+            "tor": data.get('tor', False)
+        }
+    except requests.Timeout:
+        raise  # not negative-cached, see _intel_cache
     except Exception as e:
         logger.error(f"IPQS query failed: {e}")
         return None
 
+@_intel_cache
 def query_virustotal(ip: str, api_key: Optional[str]) -> Optional[Dict]:
     if not api_key:
         return None
     url = f"https://www.virustotal.com/api/v3/ip_addresses/{ip}"
     headers = {'x-apikey': api_key}
     try:
-        response = requests.get(url, headers=headers, timeout=Config.API_TIMEOUT)
+        response = SESSION.get(url, headers=headers, timeout=CFG.INTEL_TIMEOUT)
         response.raise_for_status()
-        return response.json()
+        data = orjson.loads(response.content)
+        stats = data.get('data', {}).get('attributes', {}).get('last_analysis_stats', {})
+        return {
+            "malicious": stats.get('malicious', 0),
+            "suspicious": stats.get('suspicious', 0)
+        }
+    except requests.Timeout:
+        raise  # not negative-cached, see _intel_cache
     except Exception as e:
         logger.error(f"VirusTotal query failed: {e}")
         return None
 
+def _intel_result(future, source: str, deadline: float) -> Optional[Dict]:
+    """A lookup's result, or None if it misses the enrichment deadline"""
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeout:
+        logger.warning("%s lookup exceeded the %ss enrichment deadline", source, CFG.INTEL_DEADLINE)
+        return None
+
 def analyze_threat_intelligence(ip: str) -> Optional[Dict]:
-    print(f"\n{'='*70}")
-    print(f"  🔍 THREAT INTELLIGENCE: {ip}")
-    print(f"{'='*70}\n")
-    
-    ipqs_data = query_ipqs(ip, Config.IPQS_API_KEY)
-    vt_data = query_virustotal(ip, Config.VIRUSTOTAL_API_KEY)
+    _banner("🔍 THREAT INTELLIGENCE: %s", ip)
     
-    threat_score = 0
-    details = {"ip_address": ip, "sources": [], "raw_data": {}}
-    threat_indicators = []
+    # Both lookups share one deadline; the intel retry budget (INTEL_TIMEOUT,
+    # INTEL_RETRIES) keeps the workers themselves inside it too
+    deadline = time.monotonic() + CFG.INTEL_DEADLINE
+    ipqs_future = INTEL_POOL.submit(query_ipqs, ip, CFG.IPQS_API_KEY)
+    vt_future = INTEL_POOL.submit(query_virustotal, ip, CFG.VIRUSTOTAL_API_KEY)
+    ipqs_data = _intel_result(ipqs_future, "IPQS", deadline)
     
-    if ipqs_data:
-        fraud_score = ipqs_data.get('fraud_score', 0)
-        if fraud_score >= Config.IPQS_FRAUD_THRESHOLD:
-            threat_score += fraud_score
-            threat_indicators.append(f"IPQS Fraud Score: {fraud_score}/100")
-            details["sources"].append("IPQualityScore")
-        details["raw_data"]["ipqs"] = {"fraud_score": fraud_score}
+    # Score from plain scalars; the alert details are only assembled once
+    # an IP actually crosses the threshold (benign is the common case)
+    fraud_score = ipqs_data['fraud_score'] if ipqs_data else None
     
-    if vt_data:
-        try:
-            stats = vt_data.get('data', {}).get('attributes', {}).get('last_analysis_stats', {})
-            malicious = stats.get('malicious', 0)
-            if malicious >= Config.VT_MALICIOUS_THRESHOLD:
-                threat_score += malicious * 20
-                threat_indicators.append(f"VirusTotal: {malicious} engines flagged")
-                details["sources"].append("VirusTotal")
-        except Exception as e:
-            logger.warning(f"Could not parse VirusTotal data: {e}")
-    
-    details["threat_score"] = threat_score
-    details["threat_indicators"] = threat_indicators
-    
-    if threat_score >= Config.IPQS_FRAUD_THRESHOLD:
-        severity = "Critical" if threat_score > 150 else "High" if threat_score > 100 else "Medium"
-        print(f"🚨 MALICIOUS IP DETECTED!")
-        print(f"Severity: {severity}\n")
-        
-        return {
-            "engine": "Threat Intelligence",
-            "severity": severity,
-            "alertType": "Malicious IP Detected",
-            "details": details
-        }
+    # A near-certain IPQS verdict is Critical whatever VirusTotal says, so
+    # don't wait for it (cancel() only helps if the lookup hasn't started;
+    # one already in flight still lands in the cache)
+    ipqs_critical = fraud_score is not None and fraud_score >= CFG.IPQS_CRITICAL_SCORE
+    if ipqs_critical and not vt_future.done():
+        vt_future.cancel()
+        vt_data = None
     else:
-        print(f"✅ IP appears benign\n")
+        vt_data = _intel_result(vt_future, "VirusTotal", deadline)
+    
+    malicious = vt_data['malicious'] if vt_data else 0
+    
+    ipqs_flagged = fraud_score is not None and fraud_score >= CFG.IPQS_FRAUD_THRESHOLD
+    vt_flagged = malicious >= CFG.VT_MALICIOUS_THRESHOLD
+    threat_score = (fraud_score if ipqs_flagged else 0) + (malicious * 20 if vt_flagged else 0)
+    
+    if threat_score < CFG.IPQS_FRAUD_THRESHOLD:
+        logger.debug("✅ IP appears benign")
         return None
+    
+    if ipqs_critical or threat_score > 150:
+        severity = "Critical"
+    else:
+        severity = "High" if threat_score > 100 else "Medium"
+    logger.warning("🚨 MALICIOUS IP DETECTED! Severity: %s", severity)
+    
+    sources = []
+    threat_indicators = []
+    if ipqs_flagged:
+        threat_indicators.append(f"IPQS Fraud Score: {fraud_score}/100")
+        sources.append("IPQualityScore")
+    if vt_flagged:
+        threat_indicators.append(f"VirusTotal: {malicious} engines flagged")
+        sources.append("VirusTotal")
+    
+    return {
+        "engine": "Threat Intelligence",
+        "severity": severity,
+        "alertType": "Malicious IP Detected",
+        "details": {
+            "ip_address": ip,
+            "sources": sources,
+            "raw_data": {"ipqs": {"fraud_score": fraud_score}} if fraud_score is not None else {},
+            "threat_score": threat_score,
+            "threat_indicators": threat_indicators
+        }
+    }
 
 # === ENGINE ANALYZERS ===
-def analyze_ids(flow_data: Dict) -> Optional[Dict]:
-    if 'ids_engine' not in ENGINES:
-        return None
+def _make_analyzer(manager: Optional["ModelManager"], analyze):
+    """
+    Bind an analyzer body to its engine once, at import time.
     
-    print(f"\n{'='*70}")
-    print(f"  🛡️  IDS ENGINE")
-    print(f"{'='*70}\n")
+    A missing engine yields a stub that always returns None; otherwise the
+    closure holds the manager directly instead of looking it up in ENGINES
+    on every call.
+    """
+    if manager is None:
+        @wraps(analyze)
+        def disabled(*args, **kwargs) -> Optional[Dict]:
+            return None
+        return disabled
+    
+    @wraps(analyze)
+    def analyzer(*args, **kwargs) -> Optional[Dict]:
+        return analyze(manager, *args, **kwargs)
+    return analyzer
+
+def _analyze_ids(manager: "ModelManager", flow_data: Dict) -> Optional[Dict]:
+    _banner("🛡️  IDS ENGINE")
     
     try:
-        result = ENGINES['ids_engine'].predict(flow_data)
-        print(f"Verdict: {result['verdict']}\n")
+        result = manager.predict(flow_data)
+        logger.debug("Verdict: %s", result['verdict'])
         
         if result['is_anomaly']:
-            print(f"🚨 INTRUSION DETECTED!\n")
+            logger.warning("🚨 INTRUSION DETECTED!")
             return {
                 "engine": "IDS",
                 "severity": "High",
@@ -183,26 +360,21 @@ def analyze_ids(flow_data: Dict) -> Optional[Dict]:
                 }
             }
         else:
-            print(f"✅ Benign\n")
+            logger.debug("✅ Benign")
             return None
     except Exception as e:
         logger.error(f"IDS error: {e}")
         return None
 
-def analyze_traffic(flow_data: Dict) -> Optional[Dict]:
-    if 'traffic_engine' not in ENGINES:
-        return None
-    
-    print(f"\n{'='*70}")
-    print(f"  📊 TRAFFIC ENGINE")
-    print(f"{'='*70}\n")
+def _analyze_traffic(manager: "ModelManager", flow_data: Dict) -> Optional[Dict]:
+    _banner("📊 TRAFFIC ENGINE")
     
     try:
-        result = ENGINES['traffic_engine'].predict(flow_data)
-        print(f"Error: {result['score']:.8f}\n")
+        result = manager.predict(flow_data)
+        logger.debug("Error: %.8f", result['score'])
         
         if result['is_anomaly']:
-            print(f"🚨 ANOMALY DETECTED!\n")
+            logger.warning("🚨 ANOMALY DETECTED!")
             return {
                 "engine": "Traffic Engine",
                 "severity": "Medium",
@@ -215,27 +387,22 @@ def analyze_traffic(flow_data: Dict) -> Optional[Dict]:
                 }
             }
         else:
-            print(f"✅ Normal\n")
+            logger.debug("✅ Normal")
             return None
     except Exception as e:
         logger.error(f"Traffic error: {e}")
         return None
 
-def analyze_ueba(user_profile: Dict) -> Optional[Dict]:
-    if 'ueba_engine' not in ENGINES:
-        return None
-    
-    print(f"\n{'='*70}")
-    print(f"  👤 UEBA ENGINE")
-    print(f"{'='*70}\n")
+def _analyze_ueba(manager: "ModelManager", user_profile: Dict) -> Optional[Dict]:
+    _banner("👤 UEBA ENGINE")
     
     try:
-        result = ENGINES['ueba_engine'].predict(user_profile)
-        print(f"User: {user_profile.get('user_id')}")
-        print(f"Verdict: {result['verdict']}\n")
+        result = manager.predict(user_profile)
+        logger.debug("User: %s", user_profile.get('user_id'))
+        logger.debug("Verdict: %s", result['verdict'])
         
         if result['is_anomaly']:
-            print(f"🚨 INSIDER THREAT!\n")
+            logger.warning("🚨 INSIDER THREAT!")
             return {
                 "engine": "UEBA",
                 "severity": "Critical",
@@ -243,34 +410,29 @@ def analyze_ueba(user_profile: Dict) -> Optional[Dict]:
                 "details": {
                     "user_profile": user_profile,
                     "verdict": result['verdict'],
-                    "reconstruction_error": result['score']
+                    "reconstruction_error": result['score'],
+                    "top_features": result.get('top_features', [])
                 }
             }
         else:
-            print(f"✅ Normal\n")
+            logger.debug("✅ Normal")
             return None
     except Exception as e:
         logger.error(f"UEBA error: {e}")
         return None
 
-def analyze_artifact(file_info: Dict = None) -> Optional[Dict]:
-    if 'artifact_engine' not in ENGINES:
-        return None
-    
-    print(f"\n{'='*70}")
-    print(f"  🦠 ARTIFACT ENGINE")
-    print(f"{'='*70}\n")
+def _analyze_artifact(manager: "ModelManager", file_info: Dict = None) -> Optional[Dict]:
+    _banner("🦠 ARTIFACT ENGINE")
     
     try:
-        manager = ENGINES['artifact_engine']
         test_case = "attack" if file_info and file_info.get('is_test_malware') else "benign"
-        test_input = manager.reference['test_cases'][test_case]['input']
+        test_input = ARTIFACT_INPUTS[test_case]
         
         result = manager.predict(test_input)
-        print(f"Verdict: {result['verdict']}\n")
+        logger.debug("Verdict: %s", result['verdict'])
         
         if result['is_anomaly']:
-            print(f"🚨 MALWARE DETECTED!\n")
+            logger.warning("🚨 MALWARE DETECTED!")
             
             details = {
                 "verdict": result['verdict'],
@@ -287,12 +449,162 @@ def analyze_artifact(file_info: Dict = None) -> Optional[Dict]:
                 "details": details
             }
         else:
-            print(f"✅ Benign\n")
+            logger.debug("✅ Benign")
             return None
     except Exception as e:
         logger.error(f"Artifact error: {e}")
         return None
 
+def _bind_analyzers():
+    global analyze_ids, analyze_traffic, analyze_ueba, analyze_artifact
+    analyze_ids = _make_analyzer(ENGINES.get('ids_engine'), _analyze_ids)
+    analyze_traffic = _make_analyzer(ENGINES.get('traffic_engine'), _analyze_traffic)
+    analyze_ueba = _make_analyzer(ENGINES.get('ueba_engine'), _analyze_ueba)
+    analyze_artifact = _make_analyzer(ENGINES.get('artifact_engine'), _analyze_artifact)
+
+_bind_analyzers()
+
+# === INITIALIZATION ===
+def initialize():
+    """
+    Load the ML engines, run health checks and start the correlation brain.
+    
+    Deferred until the CLI knows it has work to do; library users call it
+    once before analysing anything.
+    """
+    global ENGINES, BRAIN, ARTIFACT_INPUTS
+    from model_manager import load_all_engines, run_system_health_check
+    
+    print("\n" + _BAR)
+    print("  🚀 INITIALIZING AEGIS SECURITY PLATFORM")
+    print(_BAR)
+    
+    # Load all engines using ModelManager
+    print("\n[1/3] Loading ML Engines...")
+    ENGINES = load_all_engines()
+    
+    if CFG.INFERENCE_BATCHING:
+        for manager in ENGINES.values():
+            manager.enable_batching()
+    
+    # Run health checks
+    print("\n[2/3] Running Health Checks...")
+    if ENGINES:
+        run_system_health_check(ENGINES)
+    else:
+        print("\n❌ NO ENGINES LOADED")
+        sys.exit(1)
+    
+    # Initialize Correlation Brain
+    print("\n[3/3] Initializing Correlation Brain...")
+    BRAIN = CorrelationBrain(
+        threshold=CFG.CORRELATION_THRESHOLD,
+        time_window=CFG.CORRELATION_TIME_WINDOW,
+        extra_patterns=(load_attack_patterns(CFG.CORRELATION_PATTERN_FILE)
+                        if CFG.CORRELATION_PATTERN_FILE else ())
+    )
+    
+    # The artifact engine replays its reference inputs; they never change
+    # after load, so pull them out of the nested reference dict once
+    ARTIFACT_INPUTS = (
+        {name: case['input']
+         for name, case in ENGINES['artifact_engine'].reference['test_cases'].items()}
+        if 'artifact_engine' in ENGINES else {}
+    )
+    _bind_analyzers()
+    
+    print("\n" + _BAR)
+    print("  ✅ AEGIS PLATFORM READY")
+    print(_BAR + "\n")
+
+# === DASHBOARD DELIVERY ===
+# Dashboard POSTs run on a background worker so detection never waits on the
+# backend. Payloads are JSON-encoded when queued, i.e. before the correlation
+# brain stamps the alert, and the queue is drained on interpreter exit.
+# Bursts are sent as one POST to the batch endpoint when the backend has it.
+ALERT_QUEUE: "queue.Queue[tuple]" = queue.Queue()
+_batch_supported = True
+
+def _post_to_dashboard(body: bytes, kind: str):
+    try:
+        response = SESSION.post(
+            CFG.BACKEND_API_URL,
+            data=body,
+            headers={"Content-Type": "application/json"},
+            timeout=CFG.API_TIMEOUT
+        )
+        response.raise_for_status()
+        logger.debug("✅ %s sent to dashboard", kind)
+    except Exception as e:
+        logger.error("Failed to send %s: %s", kind.lower(), e)
+
+def _post_batch_to_dashboard(batch: list):
+    global _batch_supported
+    
+    if len(batch) == 1 or not _batch_supported:
+        for body, kind in batch:
+            _post_to_dashboard(body, kind)
+        return
+    
+    # Bodies are already encoded, so the batch is spliced together as bytes
+    body = b'{"alerts":[' + b','.join(body for body, _ in batch) + b']}'
+    try:
+        response = SESSION.post(
+            CFG.BACKEND_BATCH_URL,
+            data=body,
+            headers={"Content-Type": "application/json"},
+            timeout=CFG.API_TIMEOUT
+        )
+        if response.status_code in (404, 405):
+            # Older backend without the batch endpoint: stop trying it
+            _batch_supported = False
+        response.raise_for_status()
+        logger.debug("✅ %d alerts sent to dashboard", len(batch))
+    except requests.HTTPError as e:
+        if e.response is not None and 400 <= e.response.status_code < 500:
+            # Batch rejected before anything was stored (validation, or no
+            # batch endpoint): fall back to one POST per payload
+            logger.warning("Batch send rejected (%s), sending individually", e)
+            for body, kind in batch:
+                _post_to_dashboard(body, kind)
+        else:
+            # A server error may have stored part of the batch; resending it
+            # entry by entry would duplicate those alerts
+            logger.error("Failed to send %d alerts: %s", len(batch), e)
+    except Exception as e:
+        logger.error("Failed to send %d alerts: %s", len(batch), e)
+
+def _dashboard_worker():
+    while True:
+        # Block for the first payload, then collect whatever else arrives
+        # within the batch window
+        batch = [ALERT_QUEUE.get()]
+        deadline = time.monotonic() + CFG.BATCH_WINDOW
+        while len(batch) < CFG.BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(ALERT_QUEUE.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        try:
+            _post_batch_to_dashboard(batch)
+        finally:
+            for _ in batch:
+                ALERT_QUEUE.task_done()
+
+def send_to_dashboard(payload: Dict, kind: str = "Alert"):
+    """Queue a payload for the dashboard without blocking the caller"""
+    # orjson emits UTF-8 bytes directly and handles numpy scores natively;
+    # json_default covers the correlation brain's lazy incident timeline
+    body = orjson.dumps(payload, default=json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    ALERT_QUEUE.put((body, kind))
+
+threading.Thread(target=_dashboard_worker, name="dashboard-sender", daemon=True).start()
+atexit.register(ALERT_QUEUE.join)
+
 # === CENTRAL ALERT PROCESSOR ===
 def process_and_send(alert: Optional[Dict]):
     """
@@ -307,44 +619,34 @@ def process_and_send(alert: Optional[Dict]):
         return
     
     # 1. Send individual alert
-    print(f"[ALERT] Sending {alert['engine']} alert to dashboard...")
-    try:
-        response = requests.post(Config.BACKEND_API_URL, json=alert, timeout=Config.API_TIMEOUT)
-        response.raise_for_status()
-        print(f"   ✅ Alert sent\n")
-    except Exception as e:
-        logger.error(f"Failed to send alert: {e}")
-        print(f"   ❌ Failed to send alert\n")
+    logger.debug("[ALERT] Sending %s alert to dashboard...", alert['engine'])
+    send_to_dashboard(alert, "Alert")
     
     # 2. Feed into correlation brain
     incident = BRAIN.ingest_alert(alert)
     
     # 3. If incident detected, send it!
     if incident:
-        print(f"{'='*70}")
-        print(f"🧠 [CORRELATION BRAIN] INCIDENT DETECTED!")
-        print(f"{'='*70}")
-        print(f"Type: {incident['alertType']}")
-        print(f"Target: {incident['details']['target_entity']}")
-        print(f"Risk Score: {incident['details']['risk_score']}")
-        print(f"Engines: {', '.join(incident['details']['engines_involved'])}")
-        print(f"{'='*70}\n")
+        # One record through the queued handlers instead of eight prints
+        details = incident['details']
+        logger.warning(
+            "%s\n🧠 [CORRELATION BRAIN] INCIDENT DETECTED!\n%s\n"
+            "Type: %s\nTarget: %s\nRisk Score: %s\nEngines: %s\n%s",
+            _BAR, _BAR, incident['alertType'], details['target_entity'],
+            details['risk_score'], ', '.join(details['engines_involved']), _BAR
+        )
         
-        try:
-            response = requests.post(Config.BACKEND_API_URL, json=incident, timeout=Config.API_TIMEOUT)
-            response.raise_for_status()
-            print(f"   ✅ Incident sent to dashboard\n")
-        except Exception as e:
-            logger.error(f"Failed to send incident: {e}")
-            print(f"   ❌ Failed to send incident\n")
+        send_to_dashboard(incident, "Incident")
 
 # === MAIN ===
 if __name__ == "__main__":
     # Check for simulation mode
     if len(sys.argv) > 1 and sys.argv[1] == "simulation":
-        print("\n" + "="*70)
+        initialize()
+        
+        print("\n" + _BAR)
         print("  🎭 RUNNING ATTACK SIMULATION")
-        print("="*70)
+        print(_BAR)
         print("\nScenario: APT Attack Chain")
         print("1. Malware downloaded")
         print("2. C2 communication starts")
@@ -352,28 +654,10 @@ if __name__ == "__main__":
         print()
         
         target_ip = "192.168.1.100"
+        demo = "--demo" in sys.argv[2:]
         
-        # Step 1: Artifact detection
-        print("Step 1: Malware Downloaded...")
-        alert1 = analyze_artifact({'filename': 'invoice.exe', 'source_ip': target_ip, 'is_test_malware': True})
-        if alert1:
-            process_and_send(alert1)
-        
-        import time
-        time.sleep(1)
+        flow_with_ip = {**ANOMALY_FLOW, 'SourceIP': target_ip}
         
-        # Step 2: Traffic anomaly
-        print("Step 2: C2 Beaconing Detected...")
-        flow_with_ip = ANOMALY_FLOW.copy()
-        flow_with_ip['SourceIP'] = target_ip
-        alert2 = analyze_traffic(flow_with_ip)
-        if alert2:
-            process_and_send(alert2)
-        
-        time.sleep(1)
-        
-        # Step 3: Threat intelligence
-        print("Step 3: Threat Intelligence Hit...")
         alert3 = {
             "engine": "Threat Intelligence",
             "severity": "High",
@@ -384,12 +668,43 @@ if __name__ == "__main__":
                 "threat_score": 95
             }
         }
-        process_and_send(alert3)
+        
+        steps = [
+            # Step 1: Artifact detection
+            ("Step 1: Malware Downloaded...",
+             lambda: analyze_artifact({'filename': 'invoice.exe', 'source_ip': target_ip, 'is_test_malware': True})),
+            # Step 2: Traffic anomaly
+            ("Step 2: C2 Beaconing Detected...",
+             lambda: analyze_traffic(flow_with_ip)),
+            # Step 3: Threat intelligence
+            ("Step 3: Threat Intelligence Hit...",
+             lambda: alert3),
+        ]
+        
+        if demo:
+            # Paced walkthrough, one step per second in chain order
+            for idx, (label, run) in enumerate(steps):
+                if idx:
+                    time.sleep(1)
+                print(label)
+                alert = run()
+                if alert:
+                    process_and_send(alert)
+        else:
+            # The engines look at disjoint data, so analyse them side by side.
+            # Results are sent from this thread: the brain is not thread-safe.
+            with ThreadPoolExecutor(max_workers=len(steps)) as pool:
+                futures = {pool.submit(run): label for label, run in steps}
+                for future in as_completed(futures):
+                    print(futures[future])
+                    alert = future.result()
+                    if alert:
+                        process_and_send(alert)
         
         # Print statistics
-        print("\n" + "="*70)
+        print("\n" + _BAR)
         print("  📊 SIMULATION COMPLETE")
-        print("="*70)
+        print(_BAR)
         
         stats = BRAIN.get_statistics()
         print(f"\nCorrelation Statistics:")
@@ -402,9 +717,9 @@ if __name__ == "__main__":
     else:
         # Normal mode
         if len(sys.argv) < 3:
-            print("\n" + "="*70)
+            print("\n" + _BAR)
             print("  USAGE")
-            print("="*70)
+            print(_BAR)
             print("\npython detector.py <mode> <indicator>")
             print("\nModes:")
             print("  traffic <anomaly|normal>")
@@ -412,7 +727,7 @@ if __name__ == "__main__":
             print("  ueba <normal|obvious>")
             print("  artifact <benign|malware>")
             print("  threatintel <IP_ADDRESS>")
-            print("  simulation                - Run APT attack simulation")
+            print("  simulation [--demo]       - Run APT attack simulation (--demo: paced)")
             print("\nExamples:")
             print("  python detector.py simulation")
             print("  python detector.py traffic anomaly")
@@ -424,6 +739,12 @@ if __name__ == "__main__":
         indicator = sys.argv[2].lower()
         alert = None
         
+        if mode not in ("traffic", "ids", "ueba", "artifact", "threatintel"):
+            print(f"❌ Unknown mode: {mode}")
+            sys.exit(1)
+        
+        initialize()
+        
         if mode == "traffic":
             flow = ANOMALY_FLOW if indicator == "anomaly" else NORMAL_FLOW
             alert = analyze_traffic(flow)
@@ -449,13 +770,9 @@ if __name__ == "__main__":
         elif mode == "threatintel":
             alert = analyze_threat_intelligence(indicator)
         
-        else:
-            print(f"❌ Unknown mode: {mode}")
-            sys.exit(1)
-        
         if alert:
             process_and_send(alert)
         else:
-            print(f"{'='*70}")
+            print(_BAR)
             print(f"  ✅ NO THREATS DETECTED")
-            print(f"{'='*70}\n")
+            print(_BAR + "\n")
@@ -0,0 +1,19 @@
+# env.py - Process-wide Environment Snapshot
+# Place in: detector/env.py
+
+import os
+from functools import cache
+
+from dotenv import load_dotenv
+
+
+@cache
+def _env():
+    """Load .env once per process and snapshot the environment"""
+    load_dotenv()
+    return dict(os.environ)
+
+
+def get_env(key, default=None):
+    """Read a setting from the cached environment snapshot"""
+    return _env().get(key, default)
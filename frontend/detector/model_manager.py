@@ -1,14 +1,196 @@
 # model_manager.py - Professional Model Management with Self-Testing
 # Place in: detector/model_manager.py
 
+import asyncio
+import logging
 import os
-import json
+import queue
+import threading
+import time
 import joblib
+import orjson
 import numpy as np
-import pandas as pd
-import tensorflow as tf
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+# TensorFlow takes seconds to import, so it is only loaded once a
+# TensorFlow engine is; processes serving sklearn engines never pay for it
+tf = None
+
+
+def import_tensorflow():
+    """Import TensorFlow on first use and bind it to the module-level tf"""
+    global tf
+    if tf is None:
+        import tensorflow
+        tf = tensorflow
+    return tf
+
+
+class EngineLogAdapter(logging.LoggerAdapter):
+    """Prefix every record with the engine it came from"""
+    
+    def process(self, msg, kwargs):
+        return f"[{self.extra['engine']}] {msg}", kwargs
+
+
+# Optional: ONNX Runtime serves exported sklearn models much faster per row
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+# Optional: Treelite runtime serves compiled tree ensembles natively
+try:
+    import treelite_runtime
+except ImportError:
+    treelite_runtime = None
+
+# Optional: Numba fuses the batched reconstruction error into one pass
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Features reported per autoencoder anomaly, largest reconstruction error first
+TOP_FEATURE_COUNT = 3
+
+# Default number of predict() results remembered per engine (0 disables)
+PREDICTION_CACHE_SIZE = 4096
+
+# Activations the NumPy forward pass can reproduce exactly
+NUMPY_ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'tanh': np.tanh,
+}
+
+
+def extract_dense_stack(model):
+    """
+    Pull (kernel, bias, activation) out of a purely sequential Dense model.
+    
+    Returns None if the model contains anything other than Dense layers
+    (plus Input/Dropout, which are no-ops at inference) or uses an
+    activation NUMPY_ACTIVATIONS can't reproduce.
+    """
+    stack = []
+    for layer in model.layers:
+        if isinstance(layer, (tf.keras.layers.InputLayer, tf.keras.layers.Dropout)):
+            continue
+        if not isinstance(layer, tf.keras.layers.Dense):
+            return None
+        activation = NUMPY_ACTIVATIONS.get(layer.activation.__name__)
+        if activation is None:
+            return None
+        weights = layer.get_weights()
+        kernel = weights[0].astype(np.float32, copy=False)
+        bias = weights[1].astype(np.float32, copy=False) if layer.use_bias else np.zeros(kernel.shape[1], np.float32)
+        stack.append((kernel, bias, activation))
+    return stack or None
+
+
+def compile_row_builder(features):
+    """
+    Generate fill_row(d, out) with the feature order baked in.
+    
+    The generated body is a single tuple of d.get(name, 0) calls with every
+    feature name as a constant, assigned to out[0] in one NumPy call: no
+    per-feature index lookups, no Python loop and no per-element
+    __setitem__. Missing features are 0 and unknown keys are ignored.
+    """
+    gets = "".join(f"get({name!r}, 0), " for name in features)
+    source = (
+        "def fill_row(d, out):\n"
+        "    get = d.get\n"
+        f"    out[0] = ({gets})\n"
+    )
+    namespace = {}
+    exec(compile(source, f"<row builder: {len(features)} features>", "exec"), namespace)
+    return namespace['fill_row']
+
+
+def reconstruction_mse(x, r, out):
+    """out[i] = mean((x[i] - r[i]) ** 2) for each row"""
+    diff = x - r
+    np.einsum('ij,ij->i', diff, diff, out=out)
+    out /= x.shape[1]
+    return out
+
+
+if njit is not None:
+    # One fused pass, no diff temporary. Not parallel: batches are a few
+    # dozen small rows, below the cost of waking worker threads
+    @njit(cache=True, fastmath=True)
+    def reconstruction_mse(x, r, out):
+        """out[i] = mean((x[i] - r[i]) ** 2) for each row"""
+        for i in range(x.shape[0]):
+            total = 0.0
+            for j in range(x.shape[1]):
+                d = x[i, j] - r[i, j]
+                total += d * d
+            out[i] = total / x.shape[1]
+        return out
+
+
+def dense_forward(x, stack):
+    """Run a Dense stack from extract_dense_stack on a 2-D input"""
+    for kernel, bias, activation in stack:
+        x = activation(x @ kernel + bias)
+    return x
+
+
+class InferenceBatcher:
+    """
+    Coalesce concurrent single-row inference calls into batched calls.
+    
+    A background thread waits up to max_wait_ms after the first queued row,
+    stacks whatever arrived (up to max_batch rows), runs the batch function
+    once and hands each caller its own row of the result via a Future.
+    """
+    
+    def __init__(self, batch_fn, max_batch=32, max_wait_ms=5.0, name="inference-batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+    
+    def submit(self, row):
+        """Queue a (1, n_features) row; the Future resolves to its (1, n) output"""
+        future = Future()
+        self._queue.put((row, future))
+        return future
+    
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(items) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                output = self.batch_fn(np.vstack([row for row, _ in items]))
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            
+            for i, (_, future) in enumerate(items):
+                future.set_result(output[i:i + 1])
+
+
 class ModelManager:
     """
     Professional ML model manager with built-in self-testing.
@@ -17,15 +199,21 @@ class ModelManager:
     with their configuration, test data, and self-validation capability.
     """
     
-    def __init__(self, engine_name, base_path=None):
+    def __init__(self, engine_name, base_path=None, cache_size=PREDICTION_CACHE_SIZE,
+                 strict_features=False):
         """
         Initialize model manager for a specific engine.
         
         Args:
             engine_name: Name of the engine (e.g., 'ids_engine')
             base_path: Path to production_models folder (auto-detected if None)
+            cache_size: predict() results to remember, keyed by input row (0 disables)
+            strict_features: Raise ValueError on input keys the model doesn't know,
+                instead of ignoring them (useful while wiring up a new caller)
         """
         self.engine_name = engine_name
+        self.strict_features = strict_features
+        self._log = EngineLogAdapter(logger, {'engine': engine_name})
         
         # Auto-detect base path
         if base_path is None:
@@ -35,47 +223,93 @@ class ModelManager:
         
         # Assets
         self.model = None
+        self._forward = None  # Concrete single-row forward pass (TensorFlow engines)
+        self._forward_batch = None  # Concrete [None, n] forward pass for stacked rows
+        self._dense_stack = None  # NumPy weights when the model is a plain Dense stack
+        self._tflite = None  # path to a validated model.tflite (interpreters are per thread)
+        self._batcher = None  # Optional InferenceBatcher (see enable_batching)
+        self._onnx = None  # (session, input name, probabilities output name)
+        self._treelite = None  # (preprocessing steps or None, compiled ensemble predictor)
+        self._feature_index = {}  # feature name -> column in the input row
+        self._feature_set = frozenset()
+        self._fill_row = None  # generated by compile_row_builder for this feature order
+        self._scratch = threading.local()  # per-thread input row and TFLite interpreter
         self.scaler = None
+        self._scaler_affine = None  # (a, c) with scaler.transform(x) == x * a + c
         self.config = {}
         self.reference = {}
         
+        # Serving paths, resolved once by _resolve_dispatch()
+        self._predict_impl = None  # scaled row -> result dict
+        self._predict_batch_impl = None  # scaled rows -> list of result dicts
+        self._reconstruct_row = None  # autoencoders: scaled row -> reconstruction
+        self._classify = None  # classifiers: scaled rows -> (labels, confidences)
+        self._threshold = None
+        self._label_by_int = {}  # class index -> verdict label
+        
+        # LRU of predict() results keyed by the raw input row's bytes. Every
+        # serving path is deterministic, so a repeated row (recurring flow
+        # fingerprint, replayed reference case) can skip inference entirely
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
         # Load everything
         self.load_assets()
     
     def load_assets(self):
-        """Load model, scaler, config, and reference data"""
-        print(f"\n[{self.engine_name}] Loading assets...")
+        """
+        Load model, scaler, config, and reference data.
+        
+        joblib files are memory-mapped read-only, so processes serving the
+        same package share one copy of the numpy-backed weights (e.g. the
+        RandomForest trees) in the page cache. This only works for
+        uncompressed dumps; joblib silently loads compressed files normally.
+        """
+        self._log.info("Loading assets...")
         
         try:
             # 1. Load Config
             config_path = self.path / "config.json"
-            with open(config_path, 'r') as f:
-                self.config = json.load(f)
+            self.config = orjson.loads(config_path.read_bytes())
+            
+            self._feature_index = {
+                name: i for i, name in enumerate(self.config['model']['input_features'])
+            }
+            self._feature_set = frozenset(self._feature_index)
+            self._fill_row = compile_row_builder(self.config['model']['input_features'])
             
-            print(f"[{self.engine_name}] ✅ Config loaded")
-            print(f"   Algorithm: {self.config['metadata']['algorithm']}")
-            print(f"   Features: {self.config['model']['feature_count']}")
+            self._log.info("✅ Config loaded (algorithm: %s, features: %d)",
+                           self.config['metadata']['algorithm'], self.config['model']['feature_count'])
             
             # 2. Load Reference Test Cases
             ref_path = self.path / "reference.json"
-            with open(ref_path, 'r') as f:
-                self.reference = json.load(f)
+            self.reference = orjson.loads(ref_path.read_bytes())
             
-            print(f"[{self.engine_name}] ✅ Reference loaded")
-            print(f"   Test cases: {len(self.reference['test_cases'])}")
+            self._log.info("✅ Reference loaded (%d test cases)", len(self.reference['test_cases']))
+            
+            # A reference case that doesn't line up with the feature list
+            # means config and reference came from different packagings
+            for test_name, test_case in self.reference['test_cases'].items():
+                unknown = test_case['input'].keys() - self._feature_set
+                missing = self._feature_set - test_case['input'].keys()
+                if unknown or missing:
+                    self._log.warning("⚠️  Reference case '%s' has %d unknown and %d missing features",
+                                      test_name, len(unknown), len(missing))
             
             # 3. Load Model
             engine_type = self.config['model']['engine_type']
             
             if engine_type == 'tensorflow':
+                import_tensorflow()
                 model_path = self.path / "model.h5"
                 self.model = tf.keras.models.load_model(model_path)
-                print(f"[{self.engine_name}] ✅ TensorFlow model loaded")
+                self._log.info("✅ TensorFlow model loaded")
             
             elif engine_type in ['sklearn', 'sklearn_pipeline']:
                 model_path = self.path / "model.joblib"
-                self.model = joblib.load(model_path)
-                print(f"[{self.engine_name}] ✅ Sklearn model loaded")
+                self.model = joblib.load(model_path, mmap_mode='r')
+                self._log.info("✅ Sklearn model loaded")
             
             else:
                 raise ValueError(f"Unknown engine type: {engine_type}")
@@ -83,17 +317,412 @@ class ModelManager:
             # 4. Load Scaler (if applicable)
             scaler_path = self.path / "scaler.joblib"
             if scaler_path.exists():
-                self.scaler = joblib.load(scaler_path)
-                print(f"[{self.engine_name}] ✅ Scaler loaded")
+                self.scaler = joblib.load(scaler_path, mmap_mode='r')
+                self._log.info("✅ Scaler loaded")
+            else:
+                self._log.info("ℹ️  No scaler (not required)")
+            
+            if engine_type != 'tensorflow':
+                self._drop_feature_names(self.model)
+            if self.scaler is not None:
+                self._drop_feature_names(self.scaler)
+            
+            # 5. Prepare fast inference paths
+            if self.scaler is not None:
+                self._scaler_affine = self._build_scaler_affine()
+            if engine_type == 'tensorflow':
+                self._forward = self._build_forward()
+                self._forward_batch = self._build_batch_forward()
+                self._dense_stack = self._build_dense_stack()
+                if self._dense_stack is None:
+                    self._tflite = self._load_tflite()
             else:
-                print(f"[{self.engine_name}] ℹ️  No scaler (not required)")
+                self._treelite = self._load_treelite()
+                if self._treelite is None and engine_type == 'sklearn':
+                    self._onnx = self._load_onnx()
+            self._resolve_dispatch()
+            
+            # 6. Warm up the serving path
+            self.warmup()
             
-            print(f"[{self.engine_name}] 🎉 All assets loaded successfully\n")
+            self._log.info("🎉 All assets loaded successfully")
             
         except Exception as e:
-            print(f"[{self.engine_name}] ❌ Error loading: {e}\n")
+            self._log.error("❌ Error loading: %s", e)
             raise
     
+    def warmup(self):
+        """
+        Push one all-zero row through predict() so the first real request
+        doesn't pay for lazy initialisation (kernel selection, sklearn's
+        first-call validation, ONNX/Treelite session setup).
+        
+        The TensorFlow forward pass is already traced in _build_forward;
+        this covers whichever path predict() actually takes. predict_batch
+        is warmed at the health check's batch size (one row per reference
+        case) as well, so the first health check is measured warm.
+        """
+        start = time.perf_counter()
+        self.predict({})
+        self.predict_batch([{}] * len(self.reference['test_cases']))
+        self._log.info("✅ Warmed up (%.1f ms)", (time.perf_counter() - start) * 1000)
+    
+    def _drop_feature_names(self, estimator):
+        """
+        Forget the column names an sklearn estimator was fitted with.
+        
+        Input rows are built positionally in config feature order, so every
+        transform/predict on a model fitted from a DataFrame would warn "X
+        does not have valid feature names". When the fitted names match the
+        config's feature list exactly, the attribute is dropped and the
+        check is skipped for this estimator only. Any mismatch is logged and
+        the names are kept, so sklearn keeps warning about it.
+        """
+        features = self.config['model']['input_features']
+        steps = [step for _, step in estimator.steps] if hasattr(estimator, 'steps') else [estimator]
+        for step in steps:
+            names = getattr(step, 'feature_names_in_', None)
+            if names is None:
+                continue
+            if list(names) == features:
+                del step.feature_names_in_
+            else:
+                self._log.warning("⚠️  %s was fitted on features that differ from the config",
+                                  type(step).__name__)
+    
+    def _build_scaler_affine(self):
+        """
+        Reduce the scaler to a per-feature affine map x * a + c.
+        
+        StandardScaler, MinMaxScaler, MaxAbsScaler and RobustScaler are all
+        per-feature affine, so probing transform() with zeros and ones yields
+        the offset and slope. A random probe confirms the fit; any other
+        scaler keeps calling transform().
+        
+        The map is applied in NumPy rather than folded into the first Dense
+        layer: the reconstruction error is measured against the scaled
+        input, so the scaled row is needed either way.
+        """
+        n = len(self._feature_index)
+        c = self.scaler.transform(np.zeros((1, n)))[0]
+        a = self.scaler.transform(np.ones((1, n)))[0] - c
+        
+        probe = np.random.default_rng(0).normal(size=(4, n))
+        if not np.allclose(probe * a + c, self.scaler.transform(probe), rtol=1e-6, atol=1e-9):
+            self._log.info("ℹ️  Scaler is not per-feature affine, using transform()")
+            return None
+        return a.astype(np.float32), c.astype(np.float32)
+    
+    def _scale(self, row):
+        """
+        Apply the scaler to a float32 input row (or stack of rows).
+        
+        The affine path scales in place with two ufunc calls and no
+        temporaries, so only pass rows the caller owns (the scratch row or a
+        freshly built batch). transform() returns a new array, cast back to
+        float32 so every model path sees a single dtype.
+        """
+        if self._scaler_affine is not None:
+            a, c = self._scaler_affine
+            np.multiply(row, a, out=row)
+            np.add(row, c, out=row)
+            return row
+        return self.scaler.transform(row).astype(np.float32, copy=False)
+    
+    def _build_forward(self):
+        """
+        Wrap the Keras model in a tf.function with a fixed 1-row signature.
+        
+        model.predict() builds a data adapter and dispatches through the
+        Keras predict loop on every call, which dwarfs the actual matmuls for
+        a single row. A traced call with a fixed signature is built once and
+        reused; the warmup below pays the tracing cost at load time.
+        
+        The shape never varies, so the forward pass is XLA-compiled (fusing
+        the dense layers into a few kernels). The model itself is not
+        compiled with jit_compile, only this explicit inference path. If XLA
+        is unavailable on this platform, the plain traced call is used.
+        
+        The concrete function for the signature is returned rather than the
+        tf.function, so per-call argument matching and trace-cache lookups
+        are skipped as well.
+        """
+        model = self.model
+        feature_count = len(self.config['model']['input_features'])
+        signature = [tf.TensorSpec([1, feature_count], tf.float32)]
+        warmup = tf.zeros([1, feature_count], tf.float32)
+        
+        try:
+            forward = tf.function(lambda x: model(x, training=False),
+                                  input_signature=signature, jit_compile=True)
+            forward(warmup)
+            self._log.info("⚡ XLA forward pass compiled")
+        except Exception as e:
+            self._log.info("ℹ️  XLA unavailable (%s), using traced forward pass", e)
+            forward = tf.function(lambda x: model(x, training=False),
+                                  input_signature=signature)
+            forward(warmup)
+        return forward.get_concrete_function()
+    
+    def _build_batch_forward(self):
+        """
+        Concrete forward pass with a [None, n_features] signature.
+        
+        Used for stacked rows (predict_batch, the micro-batcher) when the
+        NumPy dense stack isn't available. The batch dimension is left
+        unknown so one trace serves every batch size; XLA is not used here
+        because it would recompile for each new shape.
+        """
+        model = self.model
+        feature_count = len(self.config['model']['input_features'])
+        forward = tf.function(lambda x: model(x, training=False),
+                              input_signature=[tf.TensorSpec([None, feature_count], tf.float32)])
+        return forward.get_concrete_function()
+    
+    def _build_dense_stack(self):
+        """
+        Extract the autoencoder's weights for a pure NumPy forward pass.
+        
+        A single row through TensorFlow is dominated by dispatch overhead; a
+        handful of small matmuls in NumPy is far cheaper. The extracted stack
+        is checked against the TensorFlow forward pass on the reference
+        inputs and discarded if they disagree.
+        """
+        stack = extract_dense_stack(self.model)
+        if stack is None:
+            self._log.info("ℹ️  Model is not a plain Dense stack, keeping TensorFlow forward pass")
+            return None
+        
+        for test_case in self.reference['test_cases'].values():
+            row = self._input_row(test_case['input'])
+            if self.scaler:
+                row = self._scale(row)
+            expected = self._forward(tf.constant(row)).numpy()
+            if not np.allclose(dense_forward(row, stack), expected, rtol=1e-4, atol=1e-5):
+                self._log.warning("⚠️  NumPy forward pass mismatch, keeping TensorFlow forward pass")
+                return None
+        
+        self._log.info("⚡ NumPy forward pass enabled (%d Dense layers)", len(stack))
+        return stack
+    
+    def _load_tflite(self):
+        """
+        Use model.tflite (written by standardize_models) for single rows.
+        
+        Only tried when the NumPy dense stack isn't available: for a plain
+        Dense autoencoder a few NumPy matmuls beat any runtime. A float32
+        model must match the TensorFlow forward pass on every reference
+        case; a quantized one (see tflite_quantization in config.json) must
+        reach the same verdicts. Otherwise the file is ignored.
+        """
+        tflite_path = self.path / "model.tflite"
+        if not tflite_path.exists():
+            return None
+        
+        quantization = self.config['model'].get('tflite_quantization')
+        threshold = self.config['model']['threshold']
+        
+        # _tflite_forward reads the path from self._tflite
+        self._tflite = tflite_path
+        for test_case in self.reference['test_cases'].values():
+            row = self._input_row(test_case['input'])
+            if self.scaler:
+                row = self._scale(row)
+            expected = self._forward(tf.constant(row)).numpy()
+            actual = self._tflite_forward(row)
+            if quantization:
+                agrees = (np.mean((row - actual) ** 2) > threshold) == (np.mean((row - expected) ** 2) > threshold)
+            else:
+                agrees = np.allclose(actual, expected, rtol=1e-4, atol=1e-5)
+            if not agrees:
+                self._log.warning("⚠️  TFLite model disagrees with TensorFlow, ignoring it")
+                self._tflite = self._scratch.tflite = None
+                return None
+        
+        self._log.info("⚡ TFLite interpreter enabled (%s)", quantization or 'float32')
+        return tflite_path
+    
+    def _tflite_forward(self, row):
+        """Run one row through this thread's TFLite interpreter"""
+        # Interpreters aren't thread-safe, so each thread gets its own
+        runner = getattr(self._scratch, 'tflite', None)
+        if runner is None:
+            interpreter = tf.lite.Interpreter(model_path=str(self._tflite), num_threads=1)
+            interpreter.allocate_tensors()
+            runner = self._scratch.tflite = (
+                interpreter,
+                interpreter.get_input_details()[0]['index'],
+                interpreter.get_output_details()[0]['index']
+            )
+        
+        interpreter, input_index, output_index = runner
+        interpreter.set_tensor(input_index, row)
+        interpreter.invoke()
+        return interpreter.get_tensor(output_index)
+    
+    def _load_onnx(self):
+        """
+        Load model.onnx (written by standardize_models for plain sklearn
+        classifiers) into an ONNX Runtime session, if both are available.
+        
+        The session must agree with the sklearn model on every reference
+        case, otherwise it is ignored.
+        """
+        onnx_path = self.path / "model.onnx"
+        if ort is None or not onnx_path.exists():
+            return None
+        
+        session = ort.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+        input_name = session.get_inputs()[0].name
+        proba_name = session.get_outputs()[1].name
+        
+        for test_case in self.reference['test_cases'].values():
+            row = self._input_row(test_case['input'])
+            probabilities = session.run([proba_name], {input_name: row})[0]
+            if int(probabilities[0].argmax()) != int(self.model.predict(row)[0]):
+                self._log.warning("⚠️  ONNX model disagrees with sklearn, ignoring it")
+                return None
+        
+        self._log.info("⚡ ONNX Runtime session loaded")
+        return session, input_name, proba_name
+    
+    def _load_treelite(self):
+        """
+        Load model_treelite.so (the tree ensemble compiled by
+        standardize_models) if it and treelite_runtime are available.
+        
+        For a pipeline the preprocessing steps still run in sklearn; only
+        the XGBoost booster at the end is replaced. For a plain sklearn
+        forest the whole model is. The compiled predictor must agree with
+        the original model on every reference case, otherwise it is ignored.
+        Preferred over ONNX when both exist.
+        """
+        lib_path = self.path / "model_treelite.so"
+        if treelite_runtime is None or not lib_path.exists():
+            return None
+        
+        predictor = treelite_runtime.Predictor(str(lib_path), nthread=1)
+        preprocess = self.model[:-1] if self.config['model']['engine_type'] == 'sklearn_pipeline' else None
+        
+        self._treelite = (preprocess, predictor)
+        for test_case in self.reference['test_cases'].values():
+            row = self._input_row(test_case['input'])
+            if int(self._treelite_positive(row)[0] > 0.5) != int(self.model.predict(row)[0]):
+                self._log.warning("⚠️  Treelite model disagrees with sklearn, ignoring it")
+                self._treelite = None
+                return None
+        
+        self._log.info("⚡ Treelite predictor loaded")
+        return self._treelite
+    
+    def _treelite_positive(self, rows):
+        """P(class 1) per row from the compiled binary ensemble"""
+        preprocess, predictor = self._treelite
+        if preprocess is not None:
+            rows = preprocess.transform(rows)
+        probabilities = predictor.predict(treelite_runtime.DMatrix(rows))
+        # Binary models give one column; keep the positive class otherwise
+        return probabilities[:, -1] if probabilities.ndim == 2 else np.ravel(probabilities)
+    
+    def _resolve_dispatch(self):
+        """
+        Bind the serving path for this engine once, so predict() does no
+        engine-type string compares or attribute probing per call.
+        
+        Re-run whenever the available paths change (enable_batching).
+        """
+        model_config = self.config['model']
+        self._threshold = model_config['threshold']
+        self._label_by_int = {int(k): v for k, v in model_config['labels'].items()}
+        
+        if model_config['engine_type'] == 'tensorflow':
+            self._predict_impl = self._predict_autoencoder
+            self._predict_batch_impl = self._predict_batch_autoencoder
+            if self._batcher is not None:
+                self._reconstruct_row = lambda row: self._batcher.submit(row).result()
+            elif self._dense_stack is not None:
+                stack = self._dense_stack
+                self._reconstruct_row = lambda row: dense_forward(row, stack)
+            elif self._tflite is not None:
+                self._reconstruct_row = self._tflite_forward
+            else:
+                forward = self._forward
+                self._reconstruct_row = lambda row: forward(tf.constant(row, dtype=tf.float32)).numpy()
+        else:
+            self._predict_impl = self._predict_classifier
+            self._predict_batch_impl = self._predict_batch_classifier
+            if self._onnx is not None:
+                self._classify = self._classify_onnx
+            elif self._treelite is not None:
+                self._classify = self._classify_treelite
+            elif hasattr(self.model, 'predict_proba'):
+                self._classify = self._classify_proba
+            else:
+                self._classify = self._classify_labels
+    
+    def _reconstruct_batch(self, rows):
+        """Autoencoder reconstruction for a (batch, n_features) array"""
+        if self._dense_stack is not None:
+            return dense_forward(rows, self._dense_stack)
+        return self._forward_batch(tf.constant(rows, dtype=tf.float32)).numpy()
+    
+    def enable_batching(self, max_batch=32, max_wait_ms=5.0):
+        """
+        Route autoencoder inference through an InferenceBatcher.
+        
+        Worth it when predict() is called from many threads at once: the
+        concurrent rows share one model call instead of one call each.
+        No-op for non-TensorFlow engines.
+        """
+        if self.config['model']['engine_type'] != 'tensorflow' or self._batcher is not None:
+            return
+        self._batcher = InferenceBatcher(
+            self._reconstruct_batch, max_batch, max_wait_ms,
+            name=f"{self.engine_name}-batcher"
+        )
+        self._resolve_dispatch()
+        self._log.info("✅ Micro-batching enabled (max_batch=%d, max_wait=%sms)", max_batch, max_wait_ms)
+    
+    def _input_row(self, input_data):
+        """
+        Fill this thread's reusable (1, n_features) float32 row from a dict.
+        
+        Features missing from input_data are 0 and unknown keys are ignored,
+        matching the old DataFrame reindex without building a DataFrame per
+        call. The row is overwritten by the thread's next call.
+        """
+        row = getattr(self._scratch, 'row', None)
+        if row is None:
+            row = self._scratch.row = np.empty((1, len(self._feature_index)), dtype=np.float32)
+        
+        # Every column is written, so the row needs no clearing first
+        self._fill_row(input_data, row)
+        return row
+    
+    def _check_features(self, input_data):
+        """Raise ValueError if input_data has keys the model doesn't use"""
+        unknown = input_data.keys() - self._feature_set
+        if unknown:
+            raise ValueError(f"{self.engine_name}: unknown features {sorted(unknown)}")
+    
+    def _top_deviations(self, original, reconstruction, k=TOP_FEATURE_COUNT):
+        """The k features the autoencoder reconstructed worst, worst first"""
+        deviation = np.abs(original - reconstruction)
+        k = min(k, deviation.size)
+        top = np.argpartition(deviation, -k)[-k:]
+        top = top[np.argsort(-deviation[top])]
+        
+        features = self.config['model']['input_features']
+        return [
+            {
+                "feature": features[i],
+                "original": float(original[i]),
+                "reconstructed": float(reconstruction[i]),
+                "deviation": float(deviation[i])
+            }
+            for i in top
+        ]
+    
     def predict(self, input_data):
         """
         Run prediction with automatic scaling and formatting.
@@ -102,60 +731,148 @@ class ModelManager:
             input_data: Dict with feature names as keys
             
         Returns:
-            Dict with prediction results
+            Dict with prediction results. Repeated inputs may return the
+            same cached dict, so treat it as read-only.
         """
         if not self.model:
             raise RuntimeError(f"{self.engine_name}: Model not loaded")
+        if self.strict_features:
+            self._check_features(input_data)
         
-        # Get feature list from config
-        features = self.config['model']['input_features']
+        # Build the input row in config feature order
+        row = self._input_row(input_data)
         
-        # Create DataFrame with correct feature order
-        df = pd.DataFrame([input_data])
-        df = df.reindex(columns=features, fill_value=0)
+        # Key on the unscaled row: scaling below happens in place
+        key = row.tobytes() if self._cache_size else None
+        if key is not None:
+            with self._cache_lock:
+                result = self._cache.get(key)
+                if result is not None:
+                    self._cache.move_to_end(key)
+                    return result
         
         # Apply scaling if needed
         if self.scaler:
-            data_to_predict = self.scaler.transform(df)
+            data_to_predict = self._scale(row)
         else:
-            data_to_predict = df.values
+            data_to_predict = row
         
-        # Predict based on engine type
-        engine_type = self.config['model']['engine_type']
+        result = self._predict_impl(data_to_predict)
         
-        if engine_type == 'tensorflow':
-            # Autoencoder: compute reconstruction error
-            reconstruction = self.model.predict(data_to_predict, verbose=0)
-            error = np.mean(np.power(data_to_predict - reconstruction, 2), axis=1)[0]
-            
-            threshold = self.config['model']['threshold']
-            is_anomaly = error > threshold
-            
-            return {
-                "score": float(error),
-                "threshold": threshold,
-                "is_anomaly": bool(is_anomaly),
-                "verdict": self.config['model']['labels']['1'] if is_anomaly else self.config['model']['labels']['0'],
-                "confidence": float(error / threshold) if threshold else 1.0
-            }
+        if key is not None:
+            with self._cache_lock:
+                self._cache[key] = result
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return result
+    
+    def predict_batch(self, inputs):
+        """
+        Predict for several input dicts with one model call.
         
-        else:
-            # Classifier: get class prediction
-            prediction = self.model.predict(data_to_predict)[0]
-            
-            # Get probabilities if available
-            if hasattr(self.model, 'predict_proba'):
-                probabilities = self.model.predict_proba(data_to_predict)[0]
-                confidence = float(probabilities[int(prediction)])
-            else:
-                confidence = 1.0
+        The rows are stacked into a single (n, n_features) array, scaled
+        once and passed through the model once, so N framework round-trips
+        become one. Results are identical to calling predict() per input.
+        
+        Args:
+            inputs: List of dicts with feature names as keys
             
-            return {
-                "score": int(prediction),
-                "is_anomaly": prediction == 1,
-                "verdict": self.config['model']['labels'][str(int(prediction))],
-                "confidence": confidence
-            }
+        Returns:
+            List of prediction result dicts, in input order
+        """
+        if not self.model:
+            raise RuntimeError(f"{self.engine_name}: Model not loaded")
+        if not inputs:
+            return []
+        
+        rows = np.empty((len(inputs), len(self._feature_index)), dtype=np.float32)
+        for i, input_data in enumerate(inputs):
+            if self.strict_features:
+                self._check_features(input_data)
+            self._fill_row(input_data, rows[i:i + 1])
+        
+        data_to_predict = self._scale(rows) if self.scaler else rows
+        return self._predict_batch_impl(data_to_predict)
+    
+    def _predict_autoencoder(self, data_to_predict):
+        """Autoencoder: score one scaled row by its reconstruction error"""
+        reconstruction = self._reconstruct_row(data_to_predict)
+        # Mean squared error as a dot product: no squared temporary and
+        # none of np.power's generic-exponent dispatch
+        diff = (data_to_predict - reconstruction)[0]
+        error = float(diff @ diff) / diff.size
+        return self._anomaly_result(error, data_to_predict[0], reconstruction[0])
+    
+    def _predict_batch_autoencoder(self, data_to_predict):
+        reconstruction = self._reconstruct_batch(data_to_predict)
+        errors = reconstruction_mse(data_to_predict, reconstruction, np.empty(len(data_to_predict)))
+        return [
+            self._anomaly_result(float(error), original, reconstructed)
+            for error, original, reconstructed in zip(errors, data_to_predict, reconstruction)
+        ]
+    
+    def _predict_classifier(self, data_to_predict):
+        predictions, confidences = self._classify(data_to_predict)
+        return self._class_result(predictions[0], confidences[0])
+    
+    def _predict_batch_classifier(self, data_to_predict):
+        predictions, confidences = self._classify(data_to_predict)
+        return [self._class_result(p, c) for p, c in zip(predictions, confidences)]
+    
+    # Classifier backends: scaled (n, n_features) array -> (labels, confidences)
+    
+    def _classify_onnx(self, data_to_predict):
+        # One ONNX Runtime pass yields the probabilities, the predicted
+        # class is their argmax
+        session, input_name, proba_name = self._onnx
+        probabilities = session.run(
+            [proba_name], {input_name: data_to_predict}
+        )[0]
+        best = probabilities.argmax(axis=1)
+        return best, probabilities[np.arange(len(best)), best]
+    
+    def _classify_treelite(self, data_to_predict):
+        # Binary tree ensemble compiled with Treelite: returns P(class 1)
+        malicious = self._treelite_positive(data_to_predict)
+        predictions = (malicious > 0.5).astype(int)
+        return predictions, np.where(predictions == 1, malicious, 1.0 - malicious)
+    
+    def _classify_proba(self, data_to_predict):
+        # One pass through the ensemble. The class is the probabilities'
+        # argmax, exactly what predict() would recompute
+        probabilities = self.model.predict_proba(data_to_predict)
+        best = probabilities.argmax(axis=1)
+        return self.model.classes_[best], probabilities[np.arange(len(best)), best]
+    
+    def _classify_labels(self, data_to_predict):
+        predictions = self.model.predict(data_to_predict)
+        return predictions, np.ones(len(predictions))
+    
+    def _anomaly_result(self, error, original, reconstruction):
+        """Result dict for one autoencoder row"""
+        threshold = self._threshold
+        is_anomaly = error > threshold
+        
+        result = {
+            "score": float(error),
+            "threshold": threshold,
+            "is_anomaly": bool(is_anomaly),
+            "verdict": self._label_by_int[1 if is_anomaly else 0],
+            "confidence": float(error / threshold) if threshold else 1.0
+        }
+        if is_anomaly:
+            result["top_features"] = self._top_deviations(original, reconstruction)
+        return result
+    
+    def _class_result(self, prediction, confidence):
+        """Result dict for one classifier row"""
+        prediction = int(prediction)
+        return {
+            "score": prediction,
+            "is_anomaly": prediction == 1,
+            "verdict": self._label_by_int[prediction],
+            "confidence": float(confidence)
+        }
     
     def run_health_check(self):
         """
@@ -164,18 +881,15 @@ class ModelManager:
         Returns:
             bool: True if all tests pass
         """
-        print(f"\n[{self.engine_name}] 🔍 Running Health Check...")
-        print(f"{'='*60}")
+        self._log.info("🔍 Running Health Check...")
         
         test_results = []
         
-        for test_name, test_case in self.reference['test_cases'].items():
-            print(f"\nTest: {test_name}")
-            print(f"Description: {test_case['description']}")
-            
-            # Run prediction
-            result = self.predict(test_case['input'])
-            
+        # All reference cases go through the model in one batch
+        test_cases = self.reference['test_cases']
+        results = self.predict_batch([test_case['input'] for test_case in test_cases.values()])
+        
+        for (test_name, test_case), result in zip(test_cases.items(), results):
             # Check if result matches expectation
             expected_anomaly = test_case['expected_is_anomaly']
             actual_anomaly = result['is_anomaly']
@@ -184,50 +898,124 @@ class ModelManager:
             test_results.append(passed)
             
             if passed:
-                print(f"✅ PASS")
-                print(f"   Expected: {test_case['expected_label']}")
-                print(f"   Got: {result['verdict']}")
-                print(f"   Confidence: {result.get('confidence', 'N/A')}")
+                self._log.debug("✅ PASS %s (%s): expected %s, got %s, confidence %s",
+                                test_name, test_case['description'], test_case['expected_label'],
+                                result['verdict'], result.get('confidence', 'N/A'))
             else:
-                print(f"❌ FAIL")
-                print(f"   Expected: {test_case['expected_label']} (anomaly={expected_anomaly})")
-                print(f"   Got: {result['verdict']} (anomaly={actual_anomaly})")
-                print(f"   Score: {result.get('score', 'N/A')}")
-        
-        print(f"\n{'='*60}")
+                self._log.error("❌ FAIL %s (%s): expected %s (anomaly=%s), got %s (anomaly=%s), score %s",
+                                test_name, test_case['description'],
+                                test_case['expected_label'], expected_anomaly,
+                                result['verdict'], actual_anomaly, result.get('score', 'N/A'))
         
         if all(test_results):
-            print(f"[{self.engine_name}] ✅ HEALTH CHECK PASSED ({len(test_results)}/{len(test_results)})")
+            self._log.info("✅ HEALTH CHECK PASSED (%d/%d)", len(test_results), len(test_results))
             return True
         else:
             passed = sum(test_results)
             total = len(test_results)
-            print(f"[{self.engine_name}] ❌ HEALTH CHECK FAILED ({passed}/{total})")
+            self._log.error("❌ HEALTH CHECK FAILED (%d/%d)", passed, total)
             return False
 
 
+class AsyncModelManager:
+    """
+    asyncio front end that coalesces concurrent predict() calls.
+    
+    Requests queue up for at most batch_timeout_ms after the first one (or
+    until max_batch_size have arrived) and are served by one predict_batch()
+    call on the default executor, so the event loop never blocks on
+    inference. Same idea as InferenceBatcher, one level up: whole requests
+    instead of autoencoder rows, for every engine type.
+    """
+    
+    def __init__(self, manager, max_batch_size=32, batch_timeout_ms=2.0):
+        self.manager = manager
+        self.max_batch_size = max_batch_size
+        self.batch_timeout = batch_timeout_ms / 1000.0
+        self._queue = None
+        self._worker = None
+    
+    async def predict(self, input_data):
+        """Same result as ModelManager.predict(input_data)"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None:
+            # Created lazily so they bind to the loop we're actually running in
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        self._queue.put_nowait((input_data, future))
+        return await future
+    
+    async def close(self):
+        """Stop the batching task"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = self._queue = None
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self.batch_timeout
+            while len(items) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                results = await loop.run_in_executor(
+                    None, self.manager.predict_batch, [input_data for input_data, _ in items]
+                )
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(items, results):
+                # A caller may have been cancelled while the batch ran
+                if not future.done():
+                    future.set_result(result)
+
+
 # === Convenience Functions ===
 
 def load_all_engines(base_path=None):
     """
     Load all 4 engines and run health checks.
     
+    The engines are independent and their loads are dominated by file I/O
+    and native deserialisation (joblib, h5py), which release the GIL, so
+    they are loaded on a thread pool: startup takes roughly as long as the
+    slowest engine rather than the sum of all four. Log lines from
+    different engines may interleave.
+    
     Returns:
         dict: Loaded ModelManager instances by engine name
     """
     engines = {}
     engine_names = ['ids_engine', 'traffic_engine', 'ueba_engine', 'artifact_engine']
     
-    print("\n" + "="*70)
-    print("  🚀 LOADING ALL ENGINES")
-    print("="*70)
+    logger.info("🚀 LOADING ALL ENGINES")
+    
+    with ThreadPoolExecutor(max_workers=len(engine_names), thread_name_prefix="engine-loader") as pool:
+        futures = {name: pool.submit(ModelManager, name, base_path) for name in engine_names}
     
-    for name in engine_names:
+    # Collected in engine_names order so the dict order stays deterministic
+    for name, future in futures.items():
         try:
-            manager = ModelManager(name, base_path)
-            engines[name] = manager
+            engines[name] = future.result()
         except Exception as e:
-            print(f"[{name}] ❌ Failed to load: {e}\n")
+            logger.error("[%s] ❌ Failed to load: %s", name, e)
     
     return engines
 
@@ -242,37 +1030,32 @@ def run_system_health_check(engines):
     Returns:
         bool: True if all engines pass
     """
-    print("\n" + "="*70)
-    print("  🏥 SYSTEM HEALTH CHECK")
-    print("="*70)
+    logger.info("🏥 SYSTEM HEALTH CHECK")
     
     results = {}
     for name, manager in engines.items():
         results[name] = manager.run_health_check()
     
-    print("\n" + "="*70)
-    print("  📊 HEALTH CHECK SUMMARY")
-    print("="*70 + "\n")
-    
     for name, passed in results.items():
-        status = "✅ HEALTHY" if passed else "❌ UNHEALTHY"
-        print(f"{status}: {name}")
+        logger.info("%s: %s", "✅ HEALTHY" if passed else "❌ UNHEALTHY", name)
     
     passed_count = sum(results.values())
     total_count = len(results)
     
-    print(f"\n{passed_count}/{total_count} engines healthy")
+    logger.info("📊 %d/%d engines healthy", passed_count, total_count)
     
     if all(results.values()):
-        print("\n🎉 SYSTEM IS FULLY OPERATIONAL!\n")
+        logger.info("🎉 SYSTEM IS FULLY OPERATIONAL!")
         return True
     else:
-        print("\n⚠️  SYSTEM HAS ISSUES - Check failed engines\n")
+        logger.warning("⚠️  SYSTEM HAS ISSUES - Check failed engines")
         return False
 
 
 # === Main Test ===
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Load all engines
     engines = load_all_engines()
     
@@ -280,4 +1063,4 @@ if __name__ == "__main__":
     if engines:
         run_system_health_check(engines)
     else:
-        print("\n❌ No engines loaded - run standardize_models.py first\n")
+        logger.error("❌ No engines loaded - run standardize_models.py first")
@@ -2,12 +2,27 @@
 # Run from detector/ folder
 
 import os
-import json
 import shutil
 import numpy as np
 import joblib
+import orjson
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# Optional: export plain sklearn models to ONNX for faster single-row serving
+try:
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+except ImportError:
+    convert_sklearn = None
+
+# Optional: compile tree ensembles to a native Treelite library
+try:
+    import treelite
+    import treelite.sklearn
+except ImportError:
+    treelite = None
+
 # === Configuration ===
 BASE_DIR = Path(__file__).parent  # detector/
 OUTPUT_DIR = BASE_DIR / "production_models"
@@ -85,6 +100,114 @@ SOURCES = {
     }
 }
 
+def copy_file(src, dst):
+    """
+    Copy src to dst, in-kernel with os.sendfile where available.
+    
+    A hardlink would be cheaper still, but joblib.dump rewrites files in
+    place, so retraining would silently change an already-built package.
+    """
+    if not hasattr(os, 'sendfile'):
+        shutil.copy2(src, dst)
+        return
+    
+    size = os.stat(src).st_size
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+    shutil.copystat(src, dst)
+
+def load_vector(path):
+    """
+    Read a whitespace-separated test vector as a flat float64 array.
+    
+    A binary .npy copy next to the text file is preferred; np.load just
+    maps it. Otherwise the text is parsed with np.fromfile (tokenized in C,
+    much faster than np.loadtxt on the 2381-feature artifact vectors) and
+    the .npy copy is written for the next run. An empty fromfile result
+    means the file wasn't plain whitespace-separated numbers, so fall back
+    to loadtxt for that.
+    """
+    path = Path(path)
+    npy_path = path.with_suffix('.npy')
+    if npy_path.exists() and npy_path.stat().st_mtime >= path.stat().st_mtime:
+        return np.load(npy_path, mmap_mode='r')
+    
+    vec = np.fromfile(path, sep=' ')
+    if not vec.size:
+        vec = np.loadtxt(path).flatten()
+    np.save(npy_path, vec)
+    return vec
+
+def export_onnx(model_path, onnx_path, feature_count):
+    """Convert a sklearn classifier to ONNX (probabilities as a plain tensor)"""
+    model = joblib.load(model_path)
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[('input', FloatTensorType([None, feature_count]))],
+        options={type(model): {'zipmap': False}}
+    )
+    with open(onnx_path, 'wb') as f:
+        f.write(onnx_model.SerializeToString())
+
+def export_treelite(model_path, lib_path):
+    """
+    Compile a tree ensemble into a shared library.
+    
+    For a sklearn/XGBoost pipeline only the booster at the end is compiled;
+    the pipeline's preprocessing steps stay in Python. A plain sklearn
+    forest is compiled whole.
+    """
+    estimator = joblib.load(model_path)
+    if hasattr(estimator, 'steps'):
+        model = treelite.Model.from_xgboost(estimator.steps[-1][1].get_booster())
+    else:
+        model = treelite.sklearn.import_model(estimator)
+    model.export_lib(toolchain='gcc', libpath=str(lib_path), params={'parallel_comp': 8})
+
+def export_tflite(model_path, tflite_path, quantization=None, samples=None):
+    """
+    Convert a Keras autoencoder to a TFLite flatbuffer.
+    
+    quantization is None (float32), 'dynamic' (int8 weights) or 'int8'
+    (int8 weights and activations, calibrated on the scaled sample rows).
+    Input and output stay float32 in every case, so serving code doesn't
+    change.
+    """
+    import tensorflow as tf
+    
+    model = tf.keras.models.load_model(model_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'int8':
+        calibration = samples.astype(np.float32)
+        converter.representative_dataset = lambda: ([row.reshape(1, -1)] for row in calibration)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(tflite_path, 'wb') as f:
+        f.write(converter.convert())
+
+def tflite_verdicts(tflite_path, samples, threshold):
+    """Anomaly verdict (reconstruction MSE > threshold) per scaled sample row"""
+    import tensorflow as tf
+    
+    interpreter = tf.lite.Interpreter(model_path=str(tflite_path))
+    interpreter.allocate_tensors()
+    input_index = interpreter.get_input_details()[0]['index']
+    output_index = interpreter.get_output_details()[0]['index']
+    
+    verdicts = []
+    for row in samples.astype(np.float32):
+        interpreter.set_tensor(input_index, row.reshape(1, -1))
+        interpreter.invoke()
+        reconstruction = interpreter.get_tensor(output_index)[0]
+        verdicts.append(bool(np.mean((row - reconstruction) ** 2) > threshold))
+    return verdicts
+
 def create_model_package(engine_name, config):
     """Create a professional model package with self-testing capability"""
     print(f"\n{'='*70}")
@@ -95,6 +218,8 @@ def create_model_package(engine_name, config):
     package_dir.mkdir(parents=True, exist_ok=True)
     
     # 1. Copy Model
+    # joblib models must be dumped uncompressed (joblib.dump(..., compress=0)):
+    # ModelManager memory-maps them so worker processes share the weights
     model_src = BASE_DIR / config['model']
     model_dst = package_dir / ("model.h5" if config['type'] == 'tensorflow' else "model.joblib")
     
@@ -102,7 +227,7 @@ def create_model_package(engine_name, config):
         print(f"❌ Model not found: {model_src}")
         return False
     
-    shutil.copy2(model_src, model_dst)
+    copy_file(model_src, model_dst)
     size = model_dst.stat().st_size / (1024 * 1024)
     print(f"✅ Model: {model_dst.name} ({size:.2f} MB)")
     
@@ -112,7 +237,7 @@ def create_model_package(engine_name, config):
         scaler_dst = package_dir / "scaler.joblib"
         
         if scaler_src.exists():
-            shutil.copy2(scaler_src, scaler_dst)
+            copy_file(scaler_src, scaler_dst)
             size = scaler_dst.stat().st_size / 1024
             print(f"✅ Scaler: scaler.joblib ({size:.1f} KB)")
         else:
@@ -124,8 +249,63 @@ def create_model_package(engine_name, config):
         print(f"❌ Features not found: {features_src}")
         return False
     
-    with open(features_src, 'r') as f:
-        feature_list = json.load(f)
+    feature_list = orjson.loads(features_src.read_bytes())
+    
+    # 3b. Export ONNX copy of plain sklearn models (optional)
+    onnx_file = None
+    if config['type'] == 'sklearn':
+        if convert_sklearn is None:
+            print(f"ℹ️  skl2onnx not installed, skipping ONNX export")
+        else:
+            try:
+                export_onnx(model_dst, package_dir / "model.onnx", len(feature_list))
+                onnx_file = "model.onnx"
+                size = (package_dir / onnx_file).stat().st_size / (1024 * 1024)
+                print(f"✅ ONNX: model.onnx ({size:.2f} MB)")
+            except Exception as e:
+                print(f"⚠️  ONNX export failed: {e}")
+    
+    # 3c. Compile tree ensembles with Treelite (optional)
+    treelite_file = None
+    if config['algorithm'] in ('RandomForest', 'XGBoost'):
+        if treelite is None:
+            print(f"ℹ️  treelite not installed, skipping native compilation")
+        else:
+            try:
+                export_treelite(model_dst, package_dir / "model_treelite.so")
+                treelite_file = "model_treelite.so"
+                size = (package_dir / treelite_file).stat().st_size / (1024 * 1024)
+                print(f"✅ Treelite: model_treelite.so ({size:.2f} MB)")
+            except Exception as e:
+                print(f"⚠️  Treelite compilation failed: {e}")
+    
+    # 3d. Convert TensorFlow autoencoders to TFLite (optional)
+    # Quantize as far as the reference vectors still get the right verdicts:
+    # full int8, then int8 weights only, then plain float32
+    tflite_file = None
+    tflite_quantization = None
+    if config['type'] == 'tensorflow':
+        try:
+            tflite_path = package_dir / "model.tflite"
+            samples = np.stack([
+                load_vector(BASE_DIR / config['vectors']['benign']),
+                load_vector(BASE_DIR / config['vectors']['attack'])
+            ])
+            if 'scaler' in config:
+                samples = joblib.load(BASE_DIR / config['scaler']).transform(samples)
+            
+            for quantization in ('int8', 'dynamic', None):
+                export_tflite(model_dst, tflite_path, quantization, samples)
+                if quantization is None or tflite_verdicts(tflite_path, samples, config['threshold']) == [False, True]:
+                    break
+                print(f"ℹ️  {quantization} TFLite model misclassifies the reference vectors")
+            
+            tflite_file = tflite_path.name
+            tflite_quantization = quantization
+            size = tflite_path.stat().st_size / 1024
+            print(f"✅ TFLite: model.tflite ({quantization or 'float32'}, {size:.1f} KB)")
+        except Exception as e:
+            print(f"⚠️  TFLite conversion failed: {e}")
     
     # 4. Create COMPLETE config.json
     config_data = {
@@ -141,25 +321,28 @@ def create_model_package(engine_name, config):
             "feature_count": len(feature_list),
             "labels": config['labels'],
             "threshold": config['threshold'],
-            "requires_scaling": 'scaler' in config
+            "requires_scaling": 'scaler' in config,
+            "tflite_quantization": tflite_quantization
         },
         "files": {
             "model": model_dst.name,
+            "onnx": onnx_file,
+            "treelite": treelite_file,
+            "tflite": tflite_file,
             "scaler": "scaler.joblib" if 'scaler' in config else None,
             "config": "config.json",
             "reference": "reference.json"
         }
     }
     
-    with open(package_dir / "config.json", 'w') as f:
-        json.dump(config_data, f, indent=2)
+    (package_dir / "config.json").write_bytes(orjson.dumps(config_data, option=orjson.OPT_INDENT_2))
     
     print(f"✅ Config: config.json ({len(feature_list)} features)")
     
     # 5. Create SMART reference.json with expected results
     try:
-        benign_vec = np.loadtxt(BASE_DIR / config['vectors']['benign']).flatten()
-        attack_vec = np.loadtxt(BASE_DIR / config['vectors']['attack']).flatten()
+        benign_vec = load_vector(BASE_DIR / config['vectors']['benign'])
+        attack_vec = load_vector(BASE_DIR / config['vectors']['attack'])
         
         # Create feature-labeled vectors
         benign_dict = dict(zip(feature_list, benign_vec.tolist()))
@@ -189,8 +372,7 @@ def create_model_package(engine_name, config):
             }
         }
         
-        with open(package_dir / "reference.json", 'w') as f:
-            json.dump(reference_data, f, indent=2)
+        (package_dir / "reference.json").write_bytes(orjson.dumps(reference_data, option=orjson.OPT_INDENT_2))
         
         print(f"✅ Reference: reference.json (2 test cases)")
         print(f"   Benign shape: {benign_vec.shape}")
@@ -224,9 +406,11 @@ if __name__ == "__main__":
     print("  PACKAGING ENGINES")
     print(f"{'='*70}")
     
-    results = {}
-    for engine_name, config in SOURCES.items():
-        results[engine_name] = create_model_package(engine_name, config)
+    # Engines are independent, and the ONNX/Treelite/TFLite conversions are
+    # CPU-bound, so each one is packaged in its own process. Output from
+    # different engines may interleave.
+    with ProcessPoolExecutor(max_workers=len(SOURCES)) as pool:
+        results = dict(zip(SOURCES, pool.map(create_model_package, SOURCES, SOURCES.values())))
     
     # Summary
     print(f"\n{'='*70}")
@@ -246,6 +430,9 @@ if __name__ == "__main__":
         print(f"  • config.json (complete metadata)")
         print(f"  • reference.json (self-test cases)")
         print(f"  • scaler.joblib (if needed)")
+        print(f"  • model.onnx (sklearn engines, if skl2onnx is installed)")
+        print(f"  • model_treelite.so (tree ensembles, if treelite is installed)")
+        print(f"  • model.tflite (TensorFlow engines)")
         print(f"\nNext: Use ModelManager class to load and self-test")
     else:
         print(f"\n⚠️  {total - successful} engine(s) failed")
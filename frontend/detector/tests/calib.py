@@ -0,0 +1,98 @@
+# detector/calib.py - Static INT8 quantization of the ONNX autoencoders
+# Run from the detector folder after convert_to_onnx.py.
+# Requires: pip install onnxruntime
+import os
+import joblib
+import numpy as np
+import onnxruntime as ort
+from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+from models import verdict_tiers
+
+# Export prefix -> (scaler, calibration CSV, fallback vectors)
+# The CSV holds a few hundred raw (unscaled) feature rows from the training
+# split, comma-separated, no header. Without it, the two test vectors are
+# used, which is enough to produce a model but a poor activation range.
+# Both <prefix>.onnx and the scaler-fused <prefix>_scaled.onnx are quantized.
+ENGINES = {
+    'traffic_engine': (
+        'traffic_engine_scaler_final.joblib', 'traffic_calibration.csv',
+        ['traffic_benign_vector.txt', 'traffic_attack_vector.txt']
+    ),
+    'ueba_engine': (
+        'ueba_scaler.joblib', 'ueba_calibration.csv',
+        ['ueba_normal_vector.txt', 'ueba_anomaly_vector.txt']
+    ),
+}
+
+
+class ScaledRowReader(CalibrationDataReader):
+    """Feeds float32 batches to the quantizer's calibration pass"""
+
+    def __init__(self, input_name, rows, batch_size=32):
+        self._batches = iter(
+            {input_name: rows[i:i + batch_size]} for i in range(0, len(rows), batch_size)
+        )
+
+    def get_next(self):
+        return next(self._batches, None)
+
+
+def mse(path, raw, scaler):
+    """Per-row reconstruction error of an ONNX autoencoder on raw rows"""
+    session = ort.InferenceSession(path, providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+    if input_name == 'raw':
+        # Scaler-fused graph: scaled rows come back as the last output
+        out = session.run(None, {'raw': raw})
+        scaled, recon = out[-1], out[0]
+    else:
+        scaled = scaler.transform(raw).astype(np.float32)
+        recon = session.run(None, {input_name: scaled})[0]
+    return np.mean((scaled - recon) ** 2, axis=1)
+
+
+for prefix, (scaler_path, csv_path, vector_paths) in ENGINES.items():
+    try:
+        scaler = joblib.load(scaler_path)
+        if os.path.exists(csv_path):
+            raw = np.loadtxt(csv_path, delimiter=',', ndmin=2)
+        else:
+            print(f"⚠️  {csv_path} not found, calibrating {prefix} on the test vectors only")
+            raw = np.vstack([np.fromfile(p, sep=' ') for p in vector_paths])
+        raw = raw.astype(np.float32)
+        tests = np.vstack([np.fromfile(p, sep=' ') for p in vector_paths]).astype(np.float32)
+    except Exception as e:
+        print(f"❌ {prefix}: could not load calibration data: {e}")
+        continue
+
+    for fp32_path in (f'{prefix}.onnx', f'{prefix}_scaled.onnx'):
+        if not os.path.exists(fp32_path):
+            continue
+        int8_path = fp32_path[:-len('.onnx')] + '.int8.onnx'
+        print(f"\nQuantizing {fp32_path} -> {int8_path}")
+        try:
+            input_name = ort.InferenceSession(fp32_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+            # The fused graph calibrates on raw rows and scales them itself
+            rows = raw if input_name == 'raw' else scaler.transform(raw).astype(np.float32)
+            quantize_static(
+                fp32_path, int8_path, ScaledRowReader(input_name, rows),
+                quant_format=QuantFormat.QDQ, per_channel=True,
+                activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                op_types_to_quantize=['MatMul', 'Gemm']
+            )
+
+            # Quantization shifts the error distribution. The test scripts
+            # use the int8 model automatically with the fp32 thresholds, so
+            # it is only kept if every reference vector keeps its verdict.
+            fp32 = mse(fp32_path, tests, scaler)
+            int8 = mse(int8_path, tests, scaler)
+            for path, e32, e8 in zip(vector_paths, fp32, int8):
+                print(f"   {path}: fp32 MSE {e32:.8f} | int8 MSE {e8:.8f}")
+            if not np.array_equal(verdict_tiers(prefix, fp32), verdict_tiers(prefix, int8)):
+                raise ValueError("int8 model changes reference verdicts")
+            print("   ✅ Done.")
+        except Exception as e:
+            print(f"   ❌ Quantization failed: {e}")
+            if os.path.exists(int8_path):
+                os.remove(int8_path)
+                print(f"   Removed {int8_path}; the fp32 model stays in use.")
@@ -0,0 +1,28 @@
+# detector/convert_scalers.py - One-time export of the autoencoder scalers to raw NumPy
+# Run from the detector folder (same place as the test scripts).
+# The test scripts then scale with a single x * a + c, without unpickling sklearn.
+import joblib
+import numpy as np
+
+# Pickled scaler -> .affine.npy holding the stacked (a, c) float32 rows
+SCALERS = {
+    'traffic_engine_scaler_final.joblib': 'traffic_engine_scaler_final.affine.npy',
+    'ueba_scaler.joblib': 'ueba_scaler.affine.npy',
+}
+
+for scaler_path, affine_path in SCALERS.items():
+    print(f"Converting {scaler_path} -> {affine_path}")
+    try:
+        scaler = joblib.load(scaler_path)
+        n = scaler.n_features_in_
+        # Same probe as ModelManager: transform(x) == x * a + c for every
+        # Standard/MinMax/MaxAbs/Robust scaler
+        c = scaler.transform(np.zeros((1, n)))[0]
+        a = scaler.transform(np.ones((1, n)))[0] - c
+        probe = np.random.default_rng(0).normal(size=(4, n))
+        if not np.allclose(probe * a + c, scaler.transform(probe), rtol=1e-6, atol=1e-9):
+            raise ValueError("scaler is not per-feature affine")
+        np.save(affine_path, np.stack([a, c]).astype(np.float32))
+        print("   ✅ Done.")
+    except Exception as e:
+        print(f"   ❌ Conversion failed: {e}")
@@ -0,0 +1,129 @@
+# detector/convert_to_onnx.py - One-time export of the engines to ONNX
+# Run from the detector folder (same place as the test scripts).
+# Requires: pip install tf2onnx skl2onnx onnxmltools
+import joblib
+import numpy as np
+
+# Keras model -> ONNX file picked up by test_traffic_engine / test_ueba_engine
+AUTOENCODERS = {
+    'traffic_engine_autoencoder_final.h5': 'traffic_engine.onnx',
+    'insider_threat_model.h5': 'ueba_engine.onnx',
+}
+
+# Autoencoder ONNX -> (scaler, graph that takes raw rows)
+SCALED_AUTOENCODERS = {
+    'traffic_engine.onnx': ('traffic_engine_scaler_final.joblib', 'traffic_engine_scaled.onnx'),
+    'ueba_engine.onnx': ('ueba_scaler.joblib', 'ueba_engine_scaled.onnx'),
+}
+
+# sklearn pipeline/model -> ONNX file picked up by test_artifact_engine / test_ids_engine
+CLASSIFIERS = {
+    'artifact_engine_xgb_pipeline.joblib': 'artifact_engine.onnx',
+    'ids_randomforest_final.joblib': 'ids_engine.onnx',
+}
+
+try:
+    import tensorflow as tf
+    import tf2onnx
+    for h5_path, onnx_path in AUTOENCODERS.items():
+        print(f"Converting {h5_path} -> {onnx_path}")
+        try:
+            model = tf.keras.models.load_model(h5_path)
+            # Dynamic batch dimension so the same graph serves 1 or N rows
+            signature = (tf.TensorSpec((None, model.input_shape[-1]), tf.float32, name='input'),)
+            tf2onnx.convert.from_keras(model, input_signature=signature, opset=17, output_path=onnx_path)
+            print("   ✅ Done.")
+        except Exception as e:
+            print(f"   ❌ Conversion failed: {e}")
+except ImportError as e:
+    print(f"⚠️  Skipping autoencoders: {e}")
+
+
+def fuse_scaler(onnx_path, scaler_path, out_path):
+    """
+    Fold a per-feature affine scaler into the front of an autoencoder graph.
+    
+    The new graph takes raw rows on 'raw' and returns the reconstruction
+    plus the scaled input as a last 'scaled' output, since the
+    reconstruction error is measured against the scaled row.
+    """
+    import onnx
+    from onnx import helper, numpy_helper
+
+    model = onnx.load(onnx_path)
+    graph = model.graph
+    old_input = graph.input[0]
+    n = old_input.type.tensor_type.shape.dim[-1].dim_value
+
+    # Same probe as ModelManager: transform(x) == x * a + c for every
+    # Standard/MinMax/MaxAbs/Robust scaler
+    scaler = joblib.load(scaler_path)
+    c = scaler.transform(np.zeros((1, n)))[0]
+    a = scaler.transform(np.ones((1, n)))[0] - c
+    probe = np.random.default_rng(0).normal(size=(4, n))
+    if not np.allclose(probe * a + c, scaler.transform(probe), rtol=1e-6, atol=1e-9):
+        raise ValueError("scaler is not per-feature affine")
+
+    graph.initializer.extend([
+        numpy_helper.from_array(a.astype(np.float32), 'scaler_a'),
+        numpy_helper.from_array(c.astype(np.float32), 'scaler_c'),
+    ])
+    nodes = [
+        helper.make_node('Mul', ['raw', 'scaler_a'], ['raw_times_a']),
+        helper.make_node('Add', ['raw_times_a', 'scaler_c'], [old_input.name]),
+        helper.make_node('Identity', [old_input.name], ['scaled']),
+    ]
+    for node in reversed(nodes):
+        graph.node.insert(0, node)
+
+    raw = helper.make_tensor_value_info('raw', onnx.TensorProto.FLOAT, [None, n])
+    graph.input.remove(old_input)
+    graph.input.insert(0, raw)
+    graph.output.append(helper.make_tensor_value_info('scaled', onnx.TensorProto.FLOAT, [None, n]))
+    onnx.checker.check_model(model)
+    onnx.save(model, out_path)
+
+
+for onnx_path, (scaler_path, out_path) in SCALED_AUTOENCODERS.items():
+    print(f"Fusing {scaler_path} into {onnx_path} -> {out_path}")
+    try:
+        fuse_scaler(onnx_path, scaler_path, out_path)
+        print("   ✅ Done.")
+    except Exception as e:
+        print(f"   ❌ Fusion failed: {e}")
+
+try:
+    from skl2onnx import convert_sklearn, update_registered_converter
+    from skl2onnx.common.data_types import FloatTensorType
+    from skl2onnx.common.shape_calculator import calculate_linear_classifier_output_shapes
+    from onnxmltools.convert.xgboost.operator_converters.XGBoost import convert_xgboost
+    from xgboost import XGBClassifier
+
+    # Teach skl2onnx the XGBoost step so the whole pipeline (scaler + booster)
+    # lands in one graph
+    update_registered_converter(
+        XGBClassifier, 'XGBoostXGBClassifier',
+        calculate_linear_classifier_output_shapes, convert_xgboost,
+        options={'nocl': [True, False], 'zipmap': [True, False, 'columns']}
+    )
+
+    for model_path, onnx_path in CLASSIFIERS.items():
+        print(f"Converting {model_path} -> {onnx_path}")
+        try:
+            model = joblib.load(model_path)
+            classifier = model.steps[-1][1] if hasattr(model, 'steps') else model
+            # zipmap off: probabilities come back as a plain [N, 2] tensor,
+            # indexed exactly like predict_proba
+            onnx_model = convert_sklearn(
+                model,
+                initial_types=[('X', FloatTensorType([None, classifier.n_features_in_]))],
+                options={id(classifier): {'zipmap': False}},
+                target_opset={'': 17, 'ai.onnx.ml': 3}
+            )
+            with open(onnx_path, 'wb') as f:
+                f.write(onnx_model.SerializeToString())
+            print("   ✅ Done.")
+        except Exception as e:
+            print(f"   ❌ Conversion failed: {e}")
+except ImportError as e:
+    print(f"⚠️  Skipping classifiers: {e}")
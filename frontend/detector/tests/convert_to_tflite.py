@@ -0,0 +1,102 @@
+# detector/convert_to_tflite.py - One-time export of the Keras autoencoders to TFLite
+# Run from the detector folder (same place as the test scripts).
+# The test scripts then serve them with tflite_runtime, without importing TensorFlow.
+import os
+import joblib
+import numpy as np
+import tensorflow as tf
+from models import verdict_tiers
+
+# Keras model -> (.tflite, full-integer .int8.tflite) picked up by test_traffic_engine / test_ueba_engine
+# The export prefix (file name up to the first '.') selects the verdict thresholds
+AUTOENCODERS = {
+    'traffic_engine_autoencoder_final.h5': ('traffic_engine.tflite', 'traffic_engine.int8.tflite'),
+    'insider_threat_model.h5': ('ueba_engine.tflite', 'ueba_engine.int8.tflite'),
+}
+
+# Keras model -> (scaler, calibration CSV, fallback vectors), as in calib.py:
+# a few hundred raw training rows, or the two test vectors when the CSV is missing
+CALIBRATION = {
+    'traffic_engine_autoencoder_final.h5': (
+        'traffic_engine_scaler_final.joblib', 'traffic_calibration.csv',
+        ['traffic_benign_vector.txt', 'traffic_attack_vector.txt']
+    ),
+    'insider_threat_model.h5': (
+        'ueba_scaler.joblib', 'ueba_calibration.csv',
+        ['ueba_normal_vector.txt', 'ueba_anomaly_vector.txt']
+    ),
+}
+
+
+def int8_mse(tflite_path, rows):
+    """Reconstruction error of an int8-in/int8-out model on scaled float rows"""
+    interpreter = tf.lite.Interpreter(model_path=tflite_path)
+    inp, out = interpreter.get_input_details()[0], interpreter.get_output_details()[0]
+    interpreter.resize_tensor_input(inp['index'], rows.shape)
+    interpreter.allocate_tensors()
+    in_scale, in_zero = inp['quantization']
+    out_scale, out_zero = out['quantization']
+    q = np.clip(np.round(rows / in_scale + in_zero), -128, 127).astype(np.int8)
+    interpreter.set_tensor(inp['index'], q)
+    interpreter.invoke()
+    recon = (interpreter.get_tensor(out['index']).astype(np.float32) - out_zero) * out_scale
+    return np.mean((rows - recon) ** 2, axis=1)
+
+
+for h5_path, (tflite_path, int8_path) in AUTOENCODERS.items():
+    print(f"Converting {h5_path} -> {tflite_path}")
+    try:
+        model = tf.keras.models.load_model(h5_path)
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        with open(tflite_path, 'wb') as f:
+            f.write(converter.convert())
+        print("   ✅ Done.")
+    except Exception as e:
+        print(f"   ❌ Conversion failed: {e}")
+        continue
+
+    # Full-integer variant for Edge TPU / NNAPI / Hexagon delegates
+    print(f"Converting {h5_path} -> {int8_path}")
+    try:
+        scaler_path, csv_path, vector_paths = CALIBRATION[h5_path]
+        scaler = joblib.load(scaler_path)
+        if os.path.exists(csv_path):
+            raw = np.loadtxt(csv_path, delimiter=',', ndmin=2)
+        else:
+            print(f"   ⚠️  {csv_path} not found, calibrating on the test vectors only")
+            raw = np.vstack([np.fromfile(p, sep=' ') for p in vector_paths])
+        rows = scaler.transform(raw).astype(np.float32)
+
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: ((row[None, :],) for row in rows)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+        with open(int8_path, 'wb') as f:
+            f.write(converter.convert())
+
+        # A zero or non-finite scale means calibration saw no range at all
+        interpreter = tf.lite.Interpreter(model_path=int8_path)
+        for detail in interpreter.get_tensor_details():
+            scales = detail['quantization_parameters']['scales']
+            if scales.size and not (np.all(np.isfinite(scales)) and np.all(scales > 0)):
+                raise ValueError(f"degenerate quantization scale on tensor '{detail['name']}'")
+
+        # Quantization shifts the error distribution. The test scripts use
+        # the int8 model automatically with the fp32 thresholds, so it is
+        # only kept if every reference vector keeps its verdict.
+        tests = scaler.transform(np.vstack([np.fromfile(p, sep=' ') for p in vector_paths])).astype(np.float32)
+        fp32 = np.mean((tests - model.predict(tests, verbose=0)) ** 2, axis=1)
+        int8 = int8_mse(int8_path, tests)
+        for path, e32, e8 in zip(vector_paths, fp32, int8):
+            print(f"   {path}: fp32 MSE {e32:.8f} | int8 MSE {e8:.8f}")
+        prefix = tflite_path.split('.')[0]
+        if not np.array_equal(verdict_tiers(prefix, fp32), verdict_tiers(prefix, int8)):
+            raise ValueError("int8 model changes reference verdicts")
+        print("   ✅ Done.")
+    except Exception as e:
+        print(f"   ❌ Quantization failed: {e}")
+        if os.path.exists(int8_path):
+            os.remove(int8_path)
+            print(f"   Removed {int8_path}; the float32 model stays in use.")
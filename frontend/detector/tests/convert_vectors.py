@@ -0,0 +1,18 @@
+# detector/convert_vectors.py - One-time conversion of the test vectors to float32 .f32.npy
+# Run from the detector folder (same place as the test scripts).
+import numpy as np
+
+VECTOR_PATHS = [
+    'traffic_benign_vector.txt', 'traffic_attack_vector.txt',
+    'ueba_normal_vector.txt', 'ueba_anomaly_vector.txt',
+    'ids_benign_vector.txt', 'ids_attack_vector.txt',
+    'real_benign_vector.txt', 'real_malware_vector.txt',
+]
+
+for path in VECTOR_PATHS:
+    npy_path = path.replace('.txt', '.f32.npy')
+    try:
+        np.save(npy_path, np.loadtxt(path).astype(np.float32))
+        print(f"✅ {path} -> {npy_path}")
+    except Exception as e:
+        print(f"❌ {path}: {e}")
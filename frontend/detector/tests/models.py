@@ -0,0 +1,232 @@
+# detector/models.py - Shared assets for the test scripts
+# Every loader is cached by path, so scripts run in one process share a
+# single copy of each model, scaler and session.
+import functools
+import os
+import joblib
+import numpy as np
+
+# Optional: pip install onnxruntime (get_session needs it)
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+# Optional: pip install tflite-runtime (XNNPACK-backed, no TensorFlow import)
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    Interpreter = None
+
+# Intra-op threads for every backend. The test batches are a few rows, where
+# cross-core synchronisation costs more than the work; raise this to the
+# physical core count when scoring large batches.
+THREADS = 1
+
+# Verdict thresholds on reconstruction MSE, as set in test_traffic_engine.py
+# (ANOMALY_THRESHOLD) and test_ueba_engine.py (THRESH_SUSPICIOUS,
+# THRESH_CRITICAL); update them together. The int8 exports are kept only if
+# they reproduce the fp32 verdicts under these thresholds.
+VERDICT_THRESHOLDS = {
+    'traffic_engine': (0.00076731,),
+    'ueba_engine': (0.005, 0.020),
+}
+
+
+def verdict_tiers(prefix, errors):
+    """Verdict tier per error: how many of the engine's thresholds it exceeds"""
+    return np.searchsorted(VERDICT_THRESHOLDS[prefix], errors, side='left')
+
+
+def load_vector(path):
+    """
+    Read a test vector as a flat float32 array.
+    
+    The float32 .f32.npy written by convert_vectors.py is memory-mapped
+    when it is at least as new as the .txt; otherwise the whitespace-
+    separated .txt is parsed in C with np.fromfile. The distinct suffix
+    keeps it apart from the float64 .npy copies standardize_models writes.
+    """
+    npy_path = os.path.splitext(path)[0] + '.f32.npy'
+    if os.path.exists(npy_path) and os.path.getmtime(npy_path) >= os.path.getmtime(path):
+        return np.load(npy_path, mmap_mode='r')
+    return np.fromfile(path, dtype=np.float32, sep=' ')
+
+
+@functools.lru_cache(maxsize=None)
+def tflite_reconstructor(path, num_threads=THREADS):
+    """
+    Wrap a TFLite autoencoder as a scaled rows -> reconstruction function.
+    
+    The converter fixes the batch dimension at 1, so the input is resized
+    (and tensors re-allocated) whenever a batch of another size arrives.
+    Full-integer models (int8 in/out) are quantized and dequantized with
+    the tensors' own scale and zero point, so callers always see float32.
+    """
+    interpreter = Interpreter(model_path=path, num_threads=num_threads)
+    interpreter.allocate_tensors()
+    inp, out = interpreter.get_input_details()[0], interpreter.get_output_details()[0]
+    shape = [tuple(inp['shape'])]
+
+    def reconstruct(x):
+        x = np.asarray(x, dtype=np.float32)
+        if inp['dtype'] == np.int8:
+            scale, zero = inp['quantization']
+            x = np.clip(np.round(x / scale + zero), -128, 127)
+        x = np.ascontiguousarray(x, dtype=inp['dtype'])
+        if x.shape != shape[0]:
+            interpreter.resize_tensor_input(inp['index'], x.shape)
+            interpreter.allocate_tensors()
+            shape[0] = x.shape
+        interpreter.set_tensor(inp['index'], x)
+        interpreter.invoke()
+        recon = interpreter.get_tensor(out['index'])
+        if out['dtype'] == np.int8:
+            scale, zero = out['quantization']
+            recon = (recon.astype(np.float32) - zero) * scale
+        return recon
+    return reconstruct
+
+
+@functools.lru_cache(maxsize=None)
+def load_scaler(path):
+    """
+    Load a fitted sklearn scaler with its parameters cast to float32.
+    
+    transform() keeps a float32 input float32 only if the fitted
+    mean_/scale_/min_ arrays are float32 too; otherwise the result is
+    promoted to float64 and cast back before reaching the model.
+    """
+    scaler = joblib.load(path)
+    for attr in ('mean_', 'var_', 'scale_', 'min_', 'center_', 'data_min_', 'data_max_'):
+        value = getattr(scaler, attr, None)
+        if isinstance(value, np.ndarray) and value.dtype == np.float64:
+            setattr(scaler, attr, value.astype(np.float32))
+    return scaler
+
+
+@functools.lru_cache(maxsize=None)
+def load_transform(path):
+    """
+    A scaler as a plain rows -> scaled rows function.
+    
+    The .affine.npy written by convert_scalers.py next to the pickle holds
+    the scaler as x * a + c, applied without sklearn at all. Without it the
+    float32 sklearn scaler's transform() is used.
+    """
+    affine_path = os.path.splitext(path)[0] + '.affine.npy'
+    if os.path.exists(affine_path):
+        a, c = np.load(affine_path)
+        return lambda x: x * a + c
+    return load_scaler(path).transform
+
+
+@functools.lru_cache(maxsize=None)
+def get_session(path, intra_op_threads=THREADS):
+    """
+    One InferenceSession per (model, thread count), built on first use.
+    
+    The first load saves ORT's optimized graph as <path>.opt.onnx; later
+    runs load that file with optimizations off and skip the constant
+    folding and fusion passes. A re-exported model (newer than its
+    .opt.onnx) is optimized again. Nodes run sequentially on one
+    inter-op thread; intra_op_threads=0 is ORT's default (all cores).
+    """
+    opt_path = path + '.opt.onnx'
+    so = ort.SessionOptions()
+    so.intra_op_num_threads = intra_op_threads
+    so.inter_op_num_threads = 1
+    so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    if os.path.exists(opt_path) and os.path.getmtime(opt_path) >= os.path.getmtime(path):
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        path = opt_path
+    else:
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        so.optimized_model_filepath = opt_path
+    return ort.InferenceSession(path, sess_options=so, providers=['CPUExecutionProvider'])
+
+
+@functools.lru_cache(maxsize=None)
+def load_model(path):
+    """A pickled sklearn model or pipeline"""
+    return joblib.load(path)
+
+
+@functools.lru_cache(maxsize=None)
+def keras_model(path):
+    """A Keras model; TensorFlow is imported only when one is actually needed"""
+    import tensorflow as tf
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(THREADS)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except RuntimeError:
+        pass  # runtime already initialised by an earlier model; keep its pools
+    return tf.keras.models.load_model(path)
+
+
+@functools.lru_cache(maxsize=None)
+def keras_reconstructor(path):
+    """
+    Wrap a Keras autoencoder as a scaled rows -> reconstruction function.
+    
+    model.predict() runs the full Keras loop (data adapter, callbacks,
+    progress bar) on every call; an XLA-compiled direct call skips all of
+    it. The input signature leaves the batch dimension open, so the
+    function is traced once, but XLA still compiles once per distinct
+    batch shape. The test scripts use a fixed batch, so that is a single
+    compile (done by their warm-up).
+    """
+    import tensorflow as tf
+    model = keras_model(path)
+    infer = tf.function(
+        lambda x: model(x, training=False), jit_compile=True,
+        input_signature=[tf.TensorSpec([None, model.input_shape[-1]], tf.float32)]
+    )
+    return lambda x: infer(tf.constant(x, dtype=tf.float32)).numpy()
+
+
+def autoencoder_scorer(prefix, model_path, scaler_path):
+    """
+    Pick the fastest available backend for an autoencoder.
+    
+    Exports named <prefix>.* (see convert_to_onnx.py, calib.py and
+    convert_to_tflite.py) are tried in order: on ONNX Runtime
+    <prefix>_scaled.int8.onnx, <prefix>.int8.onnx, <prefix>_scaled.onnx,
+    <prefix>.onnx; then <prefix>.int8.tflite, <prefix>.tflite on
+    tflite_runtime; then the Keras model at model_path. Precision comes
+    first (int8 before fp32), the scaler-fused graph second.
+    
+    Returns (score, backend): score maps raw float32 rows to
+    (scaled rows, reconstruction), backend names the file in use.
+    """
+    exists = os.path.exists
+    onnx_path = next((p for p in (f'{prefix}_scaled.int8.onnx', f'{prefix}.int8.onnx',
+                                  f'{prefix}_scaled.onnx', f'{prefix}.onnx') if exists(p)), None)
+    if ort is not None and onnx_path and '_scaled' in onnx_path:
+        # Scaler folded into the graph: raw rows in, scaled rows out last
+        sess = get_session(onnx_path)
+        def score(x):
+            out = sess.run(None, {'raw': x})
+            return out[-1], out[0]
+        return score, onnx_path
+
+    transform = load_transform(scaler_path)
+    tflite_path = next((p for p in (f'{prefix}.int8.tflite', f'{prefix}.tflite') if exists(p)), None)
+    if ort is not None and onnx_path:
+        sess = get_session(onnx_path)
+        in_name = sess.get_inputs()[0].name
+        reconstruct = lambda x: sess.run(None, {in_name: x.astype(np.float32, copy=False)})[0]
+        backend = onnx_path
+    elif Interpreter is not None and tflite_path:
+        # TFLite/XNNPACK: same kernels, no TensorFlow import
+        reconstruct = tflite_reconstructor(tflite_path)
+        backend = tflite_path
+    else:
+        # XLA-compiled model call instead of the Keras predict loop
+        reconstruct = keras_reconstructor(model_path)
+        backend = model_path
+
+    def score(x):
+        scaled = transform(x)
+        return scaled, reconstruct(scaled)
+    return score, backend
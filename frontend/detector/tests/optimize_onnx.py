@@ -0,0 +1,28 @@
+# detector/optimize_onnx.py - One-time pre-optimization of the exported ONNX graphs
+# Run from the detector folder after convert_to_onnx.py / calib.py.
+# Writes <model>.opt.onnx next to each model; models.get_session then loads
+# those directly with optimizations off, so even the first test run skips
+# ORT's fusion and constant-folding passes.
+import os
+from models import get_session
+
+ONNX_PATHS = [
+    'traffic_engine.onnx', 'traffic_engine.int8.onnx',
+    'traffic_engine_scaled.onnx', 'traffic_engine_scaled.int8.onnx',
+    'ueba_engine.onnx', 'ueba_engine.int8.onnx',
+    'ueba_engine_scaled.onnx', 'ueba_engine_scaled.int8.onnx',
+    'ids_engine.onnx', 'artifact_engine.onnx',
+]
+
+for path in ONNX_PATHS:
+    if not os.path.exists(path):
+        continue
+    opt_path = path + '.opt.onnx'
+    try:
+        # A stale copy would be reused as-is: rebuild from the source graph
+        if os.path.exists(opt_path):
+            os.remove(opt_path)
+        get_session(path)
+        print(f"✅ {path} -> {opt_path}")
+    except Exception as e:
+        print(f"❌ {path}: {e}")
@@ -0,0 +1,41 @@
+# detector/run_all_engines.py - Run the four engine test scripts in parallel
+# Run from the detector folder (same place as the test scripts).
+import contextlib
+import io
+import os
+import runpy
+from multiprocessing import Pool
+
+TEST_SCRIPTS = [
+    'test_artifact_engine.py',
+    'test_ids_engine.py',
+    'test_traffic_engine.py',
+    'test_ueba_engine.py',
+]
+
+
+def run(script):
+    """
+    Run one test script as __main__ in this worker, returning its output.
+    
+    Output is captured so the four reports print whole and in order rather
+    than interleaved; a script bailing out with exit() ends only its own run.
+    """
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        try:
+            runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), script), run_name='__main__')
+        except SystemExit:
+            pass
+        except Exception as e:
+            print(f"❌ {script} crashed: {e}")
+    return out.getvalue()
+
+
+if __name__ == '__main__':
+    # One process per engine: the model loads overlap and each engine runs
+    # single-threaded (models.THREADS), so they don't fight over cores
+    with Pool(len(TEST_SCRIPTS)) as pool:
+        for script, output in zip(TEST_SCRIPTS, pool.map(run, TEST_SCRIPTS)):
+            print(f"\n##### {script} #####")
+            print(output, end='')
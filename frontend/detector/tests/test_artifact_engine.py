@@ -1,44 +1,50 @@
 # detector/test_artifact_engine.py (The Final, Full Vector Version)
-import joblib
+import os
 import numpy as np
 
+from models import ort, get_session, load_model, load_vector
+
 PIPELINE_PATH = 'artifact_engine_xgb_pipeline.joblib'
+ONNX_PATH = 'artifact_engine.onnx'  # fused scaler + booster, from convert_to_onnx.py
+VERBOSE = True  # per-artifact diagnostics; turn off for large artifact sets
 
-print(f"Loading Artifact Engine XGBoost Pipeline from: {PIPELINE_PATH}")
 try:
-    # Load the entire pipeline object (scaler + model)
-    artifact_pipeline = joblib.load(PIPELINE_PATH)
+    if ort is not None and os.path.exists(ONNX_PATH):
+        print(f"Loading Artifact Engine ONNX graph from: {ONNX_PATH}")
+        sess = get_session(ONNX_PATH)
+        classify = lambda x: sess.run(None, {'X': x.astype(np.float32)})
+    else:
+        print(f"Loading Artifact Engine XGBoost Pipeline from: {PIPELINE_PATH}")
+        # Load the entire pipeline object (scaler + model)
+        artifact_pipeline = load_model(PIPELINE_PATH)
+        classify = lambda x: (artifact_pipeline.predict(x), artifact_pipeline.predict_proba(x))
     print("✅ Pipeline loaded successfully.")
 except Exception as e:
     print(f"❌ ERROR: Could not load pipeline: {e}"); exit()
 
 # --- Load the FULL feature vectors from the text files ---
 try:
-    # np.loadtxt is the correct function for this file format.
+    # load_vector memory-maps the .npy copy from convert_vectors.py when it
+    # exists, otherwise it parses the text file in C with np.fromfile.
     # .reshape(1, -1) is crucial to tell the model we are predicting on a single sample.
-    real_benign_vector = np.loadtxt('real_benign_vector.txt').reshape(1, -1)
-    real_malware_vector = np.loadtxt('real_malware_vector.txt').reshape(1, -1)
+    real_benign_vector = load_vector('real_benign_vector.txt').reshape(1, -1)
+    real_malware_vector = load_vector('real_malware_vector.txt').reshape(1, -1)
     print("✅ Real feature vectors loaded successfully.")
 except Exception as e:
     print(f"❌ ERROR: Could not load vector files. Make sure they are in the 'detector' folder. Error: {e}"); exit()
 
 
 # --- Analysis Function ---
-def check_artifact(vector, artifact_type):
+def check_artifact(prediction, prediction_proba, artifact_type):
     """
-    Takes a full 2381-feature vector and gets a prediction from the pipeline.
+    Reports the pipeline's prediction for one full 2381-feature vector.
     """
     print("\n-----------------------------------------")
     print(f"Analyzing REAL {artifact_type} artifact (full vector)...")
-    
-    # The pipeline automatically handles scaling and prediction in one step.
-    # We feed it the full vector directly. No more DataFrames or reindexing.
-    prediction = artifact_pipeline.predict(vector)
-    prediction_proba = artifact_pipeline.predict_proba(vector)
-    result = int(prediction[0])
+    result = int(prediction)
     
     print(f"  - Model Prediction (0=Benign, 1=Malware): {result}")
-    print(f"  - Prediction Confidence: Benign({prediction_proba[0][0]:.2%}) | Malware({prediction_proba[0][1]:.2%})")
+    print(f"  - Prediction Confidence: Benign({prediction_proba[0]:.2%}) | Malware({prediction_proba[1]:.2%})")
     if result == 1:
         print("  - VERDICT: 🚨 MALWARE DETECTED 🚨")
     else:
@@ -47,6 +53,10 @@ def check_artifact(vector, artifact_type):
 
 # --- Run the Final Tests ---
 print("\n--- Running Final, Definitive Verification Test Suite ---")
-check_artifact(real_benign_vector, "BENIGN")
-
-check_artifact(real_malware_vector, "MALWARE")
\ No newline at end of file
+# The pipeline automatically handles scaling and prediction in one step.
+# Both full vectors are stacked and scored in a single call.
+predictions, probas = classify(np.vstack([real_benign_vector, real_malware_vector]))
+if VERBOSE:
+    for prediction, proba, artifact_type in zip(predictions, probas, ["BENIGN", "MALWARE"]):
+        check_artifact(prediction, proba, artifact_type)
+print(f"\n{np.count_nonzero(predictions == 1)} malware in {len(predictions)} artifacts")
\ No newline at end of file
@@ -1,23 +1,53 @@
 # detector/test_ids_engine.py (Final Version)
-import joblib
+import os
 import numpy as np
+from joblib import Parallel, delayed
+
+from models import ort, get_session, load_model, load_vector
+
+ONNX_PATH = 'ids_engine.onnx'  # written by convert_to_onnx.py
+PARALLEL_MIN_ROWS = 1024  # below this, joblib dispatch costs more than it saves
+VERBOSE = True  # per-flow diagnostics; turn off for large flow sets
+
+
+def sklearn_classify(model, X):
+    """
+    predict/predict_proba for a (B, features) batch from one probability pass.
+    
+    The forest only parallelizes across trees, so large batches are split
+    into one chunk per core and scored in parallel.
+    """
+    if len(X) < PARALLEL_MIN_ROWS:
+        proba = model.predict_proba(X)
+    else:
+        chunks = np.array_split(X, os.cpu_count())
+        proba = np.concatenate(Parallel(n_jobs=-1)(delayed(model.predict_proba)(c) for c in chunks))
+    return model.classes_[proba.argmax(axis=1)], proba
 
 print("--- Verifying IDS Engine ---")
 try:
-    model = joblib.load('ids_randomforest_final.joblib')
-    benign_vector = np.loadtxt('ids_benign_vector.txt').reshape(1, -1)
-    attack_vector = np.loadtxt('ids_attack_vector.txt').reshape(1, -1)
+    if ort is not None and os.path.exists(ONNX_PATH):
+        sess = get_session(ONNX_PATH)
+        classify = lambda x: sess.run(None, {'X': x.astype(np.float32)})
+        print(f"   Using ONNX Runtime ({ONNX_PATH})")
+    else:
+        model = load_model('ids_randomforest_final.joblib')
+        classify = lambda x: sklearn_classify(model, x)
+    benign_vector = load_vector('ids_benign_vector.txt').reshape(1, -1)
+    attack_vector = load_vector('ids_attack_vector.txt').reshape(1, -1)
     print("✅ All necessary files loaded.")
 except Exception as e:
     print(f"❌ ERROR: Could not load files: {e}"); exit()
 
-def check_flow(vector, flow_type):
+def check_flow(prediction, proba, flow_type):
     print(f"\n-> Analyzing REAL {flow_type} flow (full vector)...")
-    prediction = model.predict(vector)[0]
-    proba = model.predict_proba(vector)[0]
     print(f"  - Prediction (0=Normal, 1=Attack): {prediction}")
     print(f"  - Confidence: Normal({proba[0]:.2%}) | Attack({proba[1]:.2%})")
     print("  - VERDICT: " + ("🚨 ATTACK DETECTED 🚨" if prediction == 1 else "✅ Normal ✅"))
 
-check_flow(benign_vector, "NORMAL")
-check_flow(attack_vector, "ATTACK")
\ No newline at end of file
+# Both flows go through the model in one call
+predictions, probas = classify(np.vstack([benign_vector, attack_vector]))
+if VERBOSE:
+    for prediction, proba, flow_type in zip(predictions, probas, ["NORMAL", "ATTACK"]):
+        check_flow(prediction, proba, flow_type)
+print(f"\n{np.count_nonzero(predictions == 1)} attacks in {len(predictions)} flows")
@@ -1,17 +1,24 @@
-import os
 import numpy as np
-import joblib
-import tensorflow as tf
+
+# The fastest exported backend (ONNX Runtime, TFLite, else Keras) is picked
+# by models.autoencoder_scorer
+from models import autoencoder_scorer, load_vector
 
 # --- Configuration ---
 MODEL_PATH = 'traffic_engine_autoencoder_final.h5'
+EXPORT_PREFIX = 'traffic_engine'  # traffic_engine.onnx, traffic_engine.int8.tflite, ...
 SCALER_PATH = 'traffic_engine_scaler_final.joblib'
 BENIGN_VECTOR_PATH = 'traffic_benign_vector.txt'
 ATTACK_VECTOR_PATH = 'traffic_attack_vector.txt'
 
 # This matches the 99.5th percentile threshold we calculated in Colab
+# (mirrored in models.VERDICT_THRESHOLDS, which gates the int8 exports)
 ANOMALY_THRESHOLD = 0.00076731
 
+# Per-flow diagnostics; turn off when scoring large flow sets, where the
+# per-row printing costs more than the model
+VERBOSE = True
+
 def run_test():
     print("\n=======================================================")
     print("   TRAFFIC ENGINE STANDALONE PERFORMANCE TEST")
@@ -20,8 +27,8 @@ def run_test():
     # --- 1. Load Assets ---
     print("[1] Loading Model and Scaler...")
     try:
-        model = tf.keras.models.load_model(MODEL_PATH)
-        scaler = joblib.load(SCALER_PATH)
+        score, backend = autoencoder_scorer(EXPORT_PREFIX, MODEL_PATH, SCALER_PATH)
+        print(f"   Using {backend}")
         print("   ✅ Assets loaded successfully.")
     except Exception as e:
         print(f"   ❌ FATAL ERROR: Could not load model or scaler: {e}")
@@ -31,46 +38,52 @@ def run_test():
     print("\n[2] Loading Test Vectors (Ground Truth from Colab)...")
     try:
         # Load the text files and reshape them to (1, 77) so the model accepts them as a single sample
-        benign_vec = np.loadtxt(BENIGN_VECTOR_PATH).reshape(1, -1)
-        attack_vec = np.loadtxt(ATTACK_VECTOR_PATH).reshape(1, -1)
+        benign_vec = load_vector(BENIGN_VECTOR_PATH).reshape(1, -1)
+        attack_vec = load_vector(ATTACK_VECTOR_PATH).reshape(1, -1)
         print("   ✅ Vectors loaded successfully.")
     except Exception as e:
         print(f"   ❌ FATAL ERROR: Could not load vector text files: {e}")
         return
 
-    # --- 3. Define Analysis Function ---
-    def analyze_flow(vector, label):
+    # --- 3. Score Both Flows in One Call ---
+    # One (2, 77) batch: the per-call model overhead is paid once, not per flow
+    batch = np.vstack([benign_vec, attack_vec])  # float32 end to end: vectors, scaler and model
+
+    # Warm up with a same-shaped zero batch: the first call builds ORT's plan,
+    # TFLite's tensors or TF's graph, the second runs on the warm caches
+    for _ in range(2):
+        score(np.zeros_like(batch))
+
+    # A. Scale the raw data (CRITICAL STEP) and B. get the reconstructions
+    # The autoencoder only understands data between 0 and 1; the fused
+    # ONNX graph scales internally and hands the scaled rows back
+    scaled, reconstruction = score(batch)
+
+    # C. Calculate Mean Squared Error (MSE) per row
+    # MSE = Average of (Original - Reconstruction)^2; einsum squares and sums
+    # each row in one pass instead of materialising the squared array
+    d = scaled - reconstruction
+    errors = np.einsum('ij,ij->i', d, d) / d.shape[1]
+
+    # D. Verdicts for the whole batch in one comparison
+    is_anomaly = errors > ANOMALY_THRESHOLD
+
+    # --- 4. Define Analysis Function ---
+    def analyze_flow(error, anomaly, label):
         print(f"\n--- Testing {label} Flow ---")
-        
-        # A. Scale the raw data (CRITICAL STEP)
-        # The autoencoder only understands data between 0 and 1
-        scaled_vector = scaler.transform(vector)
-        
-        # B. Get the reconstruction
-        reconstruction = model.predict(scaled_vector, verbose=0)
-        
-        # C. Calculate Mean Squared Error (MSE)
-        # MSE = Average of (Original - Reconstruction)^2
-        error = np.mean(np.power(scaled_vector - reconstruction, 2))
-        
         print(f"   Reconstruction Error: {error:.8f}")
         print(f"   Anomaly Threshold:    {ANOMALY_THRESHOLD:.8f}")
-        
-        # D. Verdict
-        if error > ANOMALY_THRESHOLD:
-            print("   Verdict:              🚨 ANOMALY DETECTED")
-            is_anomaly = True
-        else:
-            print("   Verdict:              ✅ NORMAL TRAFFIC")
-            is_anomaly = False
-            
-        return error, is_anomaly
+        print("   Verdict:              " + ("🚨 ANOMALY DETECTED" if anomaly else "✅ NORMAL TRAFFIC"))
 
-    # --- 4. Run Comparisons ---
-    error_normal, result_normal = analyze_flow(benign_vec, "NORMAL (Median Benign)")
-    error_attack, result_attack = analyze_flow(attack_vec, "ATTACK (Worst DDoS)")
+    # --- 5. Run Comparisons ---
+    if VERBOSE:
+        labels = ["NORMAL (Median Benign)", "ATTACK (Worst DDoS)"]
+        for err, anomaly, label in zip(errors, is_anomaly, labels):
+            analyze_flow(err, anomaly, label)
+    print(f"\n   {is_anomaly.sum()} anomalies in {len(is_anomaly)} flows")
+    (error_normal, error_attack), (result_normal, result_attack) = errors, is_anomaly
 
-    # --- 5. Final Report ---
+    # --- 6. Final Report ---
     print("\n=======================================================")
     print("   FINAL DIAGNOSTIC REPORT")
     print("=======================================================")
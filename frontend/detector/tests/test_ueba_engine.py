@@ -1,17 +1,20 @@
 # detector/test_ueba_engine.py (3-Tier Classification Version)
-import tensorflow as tf
 import numpy as np
-import joblib
 import json
-import os
+
+# The fastest exported backend (ONNX Runtime, TFLite, else Keras) is picked
+# by models.autoencoder_scorer
+from models import autoencoder_scorer, load_vector
 
 # --- Configuration ---
 MODEL_PATH = 'insider_threat_model.h5'
+EXPORT_PREFIX = 'ueba_engine'  # ueba_engine.onnx, ueba_engine.int8.tflite, ...
 SCALER_PATH = 'ueba_scaler.joblib'
 NORMAL_VEC_PATH = 'ueba_normal_vector.txt'
 ANOMALY_VEC_PATH = 'ueba_anomaly_vector.txt'
 
 # ** UPDATE THESE WITH VALUES FROM COLAB **
+# (and in models.VERDICT_THRESHOLDS, which gates the int8 exports)
 THRESH_SUSPICIOUS = 0.005000 # Example value - REPLACE ME
 THRESH_CRITICAL = 0.020000   # Example value - REPLACE ME
 
@@ -22,8 +25,8 @@ print("=======================================================\n")
 # --- 1. Load Assets ---
 print("[1] Loading Model and Scaler...")
 try:
-    model = tf.keras.models.load_model(MODEL_PATH)
-    scaler = joblib.load(SCALER_PATH)
+    score, backend = autoencoder_scorer(EXPORT_PREFIX, MODEL_PATH, SCALER_PATH)
+    print(f"   Using {backend}")
     print("   ✅ Assets loaded successfully.")
 except Exception as e:
     print(f"   ❌ FATAL ERROR: {e}"); exit()
@@ -31,42 +34,49 @@ except Exception as e:
 # --- 2. Load Vectors ---
 print("\n[2] Loading Test Vectors...")
 try:
-    normal_vec = np.loadtxt(NORMAL_VEC_PATH).reshape(1, -1)
-    anomaly_vec = np.loadtxt(ANOMALY_VEC_PATH).reshape(1, -1)
+    normal_vec = load_vector(NORMAL_VEC_PATH).reshape(1, -1)
+    anomaly_vec = load_vector(ANOMALY_VEC_PATH).reshape(1, -1)
     print("   ✅ Vectors loaded successfully.")
 except Exception as e:
     print(f"   ❌ FATAL ERROR: {e}"); exit()
 
 # --- 3. Analysis Function ---
-def analyze_user(vector, label):
+VERDICT_TEXT = {
+    "Critical": f"🔴 PROBABLE THREAT (Critical > {THRESH_CRITICAL})",
+    "High": f"🟡 SUSPICIOUS (Warning > {THRESH_SUSPICIOUS})",
+    "Low": "🟢 NORMAL USER",
+}
+
+def classify_users(errors):
+    """3-Tier Logic for a whole batch of reconstruction errors"""
+    return np.select(
+        [errors > THRESH_CRITICAL, errors > THRESH_SUSPICIOUS], ["Critical", "High"], default="Low"
+    )
+
+def analyze_user(error, verdict, label):
     print(f"\n--- Testing {label} Profile ---")
-    
-    # Scale & Predict
-    scaled_vec = scaler.transform(vector)
-    reconstruction = model.predict(scaled_vec, verbose=0)
-    error = np.mean(np.power(scaled_vec - reconstruction, 2))
-    
     print(f"   Reconstruction Error: {error:.8f}")
-    
-    # 3-Tier Logic
-    if error > THRESH_CRITICAL:
-        print(f"   Verdict:              🔴 PROBABLE THREAT (Critical > {THRESH_CRITICAL})")
-        return "Critical"
-    elif error > THRESH_SUSPICIOUS:
-        print(f"   Verdict:              🟡 SUSPICIOUS (Warning > {THRESH_SUSPICIOUS})")
-        return "High"
-    else:
-        print(f"   Verdict:              🟢 NORMAL USER")
-        return "Low"
+    print(f"   Verdict:              {VERDICT_TEXT[verdict]}")
+    return verdict
 
 # --- 4. Run Tests ---
-# We test the Median Normal (should be Green)
-res1 = analyze_user(normal_vec, "MEDIAN NORMAL")
-
-# We test the Worst Anomaly (should be Red)
-res2 = analyze_user(anomaly_vec, "WORST ANOMALY")
-
 # Let's create a fake "Suspicious" user to test the Yellow zone
 # We do this by averaging the normal and anomaly vectors
 middle_vec = (normal_vec + anomaly_vec) / 4 # Closer to normal, but weird enough
-res3 = analyze_user(middle_vec, "SIMULATED SUSPICIOUS")
\ No newline at end of file
+
+batch = np.vstack([normal_vec, anomaly_vec, middle_vec])  # float32 end to end: vectors, scaler and model
+
+# Warm up with a same-shaped zero batch: the first call builds ORT's plan,
+# TFLite's tensors or TF's graph, the second runs on the warm caches
+for _ in range(2):
+    score(np.zeros_like(batch))
+
+# Scale & Predict all three profiles in a single call
+scaled, reconstruction = score(batch)
+d = scaled - reconstruction
+errors = np.einsum('ij,ij->i', d, d) / d.shape[1]  # per-row MSE, one pass
+verdicts = classify_users(errors)
+
+# Median Normal (should be Green), Worst Anomaly (should be Red), Simulated (Yellow)
+labels = ["MEDIAN NORMAL", "WORST ANOMALY", "SIMULATED SUSPICIOUS"]
+res1, res2, res3 = [analyze_user(err, str(v), label) for err, v, label in zip(errors, verdicts, labels)]
\ No newline at end of file
@@ -35,6 +35,48 @@ router.post('/', optionalAuth, async (req, res) => {
     }
 });
 
+/**
+ * POST /api/alerts/batch
+ * Create several alerts in one request (detector bursts)
+ * Body: { alerts: [ ... ] }
+ */
+router.post('/batch', optionalAuth, async (req, res) => {
+    try {
+        const { alerts } = req.body;
+
+        if (!Array.isArray(alerts) || alerts.length === 0) {
+            return res.status(400).json({
+                message: "Expected a non-empty 'alerts' array"
+            });
+        }
+
+        console.log(`\n[${new Date().toISOString()}] Batch of ${alerts.length} alerts received`);
+
+        // Validate everything first so a bad entry never leaves a partial batch
+        const docs = alerts.map(data => new Alert(data));
+        await Promise.all(docs.map(doc => doc.validate()));
+
+        const savedAlerts = await Alert.insertMany(docs);
+
+        console.log(`✅ ${savedAlerts.length} alerts saved`);
+
+        // Broadcast to all connected clients
+        savedAlerts.forEach(broadcastNewAlert);
+
+        res.status(201).json(savedAlerts);
+    } catch (error) {
+        console.error("❌ Error saving alert batch:", error);
+        // Only a validation failure guarantees nothing was stored; a database
+        // error can hit partway through the ordered insert, so the client
+        // must not resend the batch entry by entry
+        const isValidation = error.name === 'ValidationError';
+        res.status(isValidation ? 422 : 500).json({
+            message: "Error saving alert batch",
+            error: error.message
+        });
+    }
+});
+
 /**
  * GET /api/alerts
  * Get alerts with RBAC filtering